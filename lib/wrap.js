@@ -459,3 +459,4 @@ const wrap = async (ctx) => {
 };
 
 module.exports = wrap;
+module.exports.wrapPython = wrapPython;
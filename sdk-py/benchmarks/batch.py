@@ -0,0 +1,48 @@
+"""
+Per-record overhead of iterating a batch through `BatchRecords` versus
+iterating the records directly, and memory allocated by the recording for
+growing batch sizes (constant, records themselves excluded).
+"""
+import tracemalloc
+
+from common import bench
+from serverless_sdk.batch_records import BatchRecords
+
+
+def make_event(size):
+    return {
+        "Records": [
+            {"eventSource": "aws:sqs", "messageId": "message-{}".format(i), "body": "{}"}
+            for i in range(size)
+        ]
+    }
+
+
+def plain(event):
+    for record in event["Records"]:
+        pass
+
+
+def recorded(event):
+    batch = BatchRecords(event)
+    for record in batch:
+        pass
+    return batch.close(False)
+
+
+def main():
+    event = make_event(1000)
+    bench("1000 records, plain loop", lambda: plain(event), number=200)
+    bench("1000 records, BatchRecords", lambda: recorded(event), number=200)
+
+    for size in (1000, 10000, 100000):
+        event = make_event(size)
+        tracemalloc.start()
+        recorded(event)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("{:<48} {:>12} B".format("{} records, peak allocated".format(size), peak))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Helpers shared by the SDK micro-benchmarks.
+
+Benchmarks are plain scripts, run them from the `sdk-py` directory, e.g.:
+
+    python benchmarks/emitter.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeContext(object):
+    function_name = "benchmark"
+    invoked_function_arn = "arn:aws:lambda:us-east-1:000000000000:function:benchmark"
+    aws_request_id = "00000000-0000-0000-0000-000000000000"
+    memory_limit_in_mb = "1024"
+
+    def __init__(self, remaining_time_ms=6000):
+        self.remaining_time_ms = remaining_time_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_time_ms
+
+
+class NullStream(object):
+    def write(self, data):
+        pass
+
+    def flush(self):
+        pass
+
+
+def make_sdk(**kwargs):
+    import serverless_sdk
+
+    options = dict(
+        org_id="org",
+        application_name="app",
+        app_uid="app-uid",
+        org_uid="org-uid",
+        deployment_uid="deployment-uid",
+        service_name="service",
+        should_log_meta=True,
+        should_compress_logs=True,
+        disable_aws_spans=False,
+        disable_http_spans=False,
+        stage_name="dev",
+        plugin_version="0.0.0",
+        disable_frameworks_instrumentation=True,
+        serverless_platform_stage="prod",
+    )
+    options.update(kwargs)
+    sdk = serverless_sdk.SDK(**options)
+    sdk.emitter.stream = NullStream()
+    return sdk
+
+
+def bench(label, func, number=1000, repeat=5):
+    """Prints the best per-call time of `func` in microseconds"""
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print("{:<48} {:>12.2f} us".format(label, best * 1e6))
+    return best
@@ -0,0 +1,40 @@
+'use strict';
+
+/*
+ * Prints the event types detected by the JS SDK (sdk-js/src/lib/event-detection)
+ * as a JSON array of `{ event, type }`: first the events of its unit tests, then
+ * the JSON array of events read from stdin.
+ *
+ * Usage: node detect_events.js < events.json
+ */
+
+const Module = require('module');
+const fs = require('fs');
+const path = require('path');
+
+const eventDetectionPath = path.join(__dirname, '../../sdk-js/src/lib/event-detection');
+const detectEventType = require(eventDetectionPath);
+
+// run the unit tests only to collect the events they check, without mocha or chai
+const events = [];
+const load = Module._load;
+Module._load = function (request, ...args) {
+  if (request === 'chai') return { expect: () => ({ to: { equal: () => {} } }) };
+  if (request === '../event-detection') {
+    return (event) => {
+      events.push(event);
+      return detectEventType(event);
+    };
+  }
+  return load.call(this, request, ...args);
+};
+global.describe = (name, fn) => fn();
+global.it = (name, fn) => fn();
+global.xit = () => {};
+require(path.join(eventDetectionPath, 'index.test.js'));
+Module._load = load;
+
+events.push(...JSON.parse(fs.readFileSync(0, 'utf8')));
+process.stdout.write(
+  JSON.stringify(events.map((event) => ({ event, type: detectEventType(event) })))
+);
@@ -0,0 +1,111 @@
+"""
+Local Lambda emulator: imports a handler the way the Python runtime does and
+invokes it in a loop with a Lambda-like context, on the main thread of a
+fresh process (the SDK installs its SIGTERM handler from there).
+
+Writes a JSON report with the cold start, the duration of every warm
+invocation, the memory allocated per invocation and the RSS growth:
+
+    python benchmarks/emulator.py <module.handler> <report.json> [options]
+
+Run by overhead.py, once per scenario with and without the SDK.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import uuid
+from importlib import import_module
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class LambdaContext(object):
+    def __init__(self, function_name, memory_size, timeout):
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.invoked_function_arn = (
+            "arn:aws:lambda:us-east-1:000000000000:function:" + function_name
+        )
+        self.memory_limit_in_mb = memory_size
+        self.log_group_name = "/aws/lambda/" + function_name
+        self.log_stream_name = "benchmark"
+        self.aws_request_id = str(uuid.uuid4())
+        self.deadline = time.time() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return int(max(self.deadline - time.time(), 0) * 1000)
+
+
+def rss():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+def invoke(handler, args):
+    context = LambdaContext(args.function_name, args.memory_size, args.timeout)
+    started = time.perf_counter()
+    try:
+        handler({}, context)
+    except Exception:
+        pass  # reported as an error by the runtime, as for a real function
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("handler", help="module.function, as the Lambda handler setting")
+    parser.add_argument("report", help="path of the JSON report to write")
+    parser.add_argument("--invocations", type=int, default=200)
+    parser.add_argument("--allocation-invocations", type=int, default=20)
+    parser.add_argument("--function-name", default="benchmark")
+    parser.add_argument("--memory-size", default="1024")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_LAMBDA_FUNCTION_NAME", args.function_name)
+    os.environ.setdefault("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", args.memory_size)
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+
+    rss_start = rss()
+    started = time.perf_counter()
+    module_name, handler_name = args.handler.rsplit(".", 1)
+    handler = getattr(import_module(module_name), handler_name)
+    import_duration = time.perf_counter() - started
+    first_invocation = invoke(handler, args)
+    rss_warm = rss()
+
+    durations = [invoke(handler, args) for _ in range(args.invocations)]
+    rss_end = rss()
+
+    # traced separately, tracing slows everything down
+    allocated = []
+    tracemalloc.start()
+    for _ in range(args.allocation_invocations):
+        if hasattr(tracemalloc, "reset_peak"):  # python 3.9+
+            tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        invoke(handler, args)
+        allocated.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    with open(args.report, "w") as report:
+        json.dump(
+            {
+                "importDuration": import_duration,
+                "firstInvocation": first_invocation,
+                "durations": durations,
+                "allocatedPerInvocation": allocated,
+                "rssAfterColdStart": rss_warm - rss_start,
+                "rssGrowth": rss_end - rss_warm,
+                "maxRss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            },
+            report,
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
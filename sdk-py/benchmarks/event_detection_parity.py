@@ -0,0 +1,80 @@
+"""
+Checks that the Python event detection agrees with the JS SDK's: runs both
+over the events of the JS unit tests and the ones below (events matching
+several detectors, or almost matching one), and lists every disagreement.
+
+Needs node, run from the `sdk-py` directory:
+
+    python benchmarks/event_detection_parity.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+import common  # noqa: F401 (puts the SDK on the path)
+from serverless_sdk.event_detection import detect_event_type
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+AWSLOGS = {"data": "H4sIAAAAAAAAAA=="}
+SQS_RECORD = {"eventSource": "aws:sqs", "eventSourceARN": "arn:aws:sqs:::queue"}
+
+EVENTS = [
+    # Records detectors around the awslogs, firehose and scheduled ones
+    {"Records": [{"cf": {"config": {}}}], "awslogs": AWSLOGS},
+    {"Records": [{"eventSource": "aws:kinesis"}], "awslogs": AWSLOGS},
+    {
+        "Records": [{"eventSource": "aws:s3"}],
+        "deliveryStreamArn": "arn:aws:firehose:::deliverystream/stream",
+        "records": [{"kinesisRecordMetadata": {}}],
+    },
+    {"Records": [{"eventSource": "aws:s3"}], "source": "aws.events"},
+    {"Records": [SQS_RECORD], "source": "aws.events"},
+    {"Records": [{"EventSource": "aws:sns"}], "source": "x", "detail": {}},
+    # event source spelling
+    {"Records": [{"EventSource": "aws:sqs"}]},
+    {"Records": [{"eventSource": "aws:sns"}]},
+    {"Records": [{"EventSource": "aws:sns", "eventSource": "aws:sqs"}]},
+    # incomplete or empty values
+    {"Records": []},
+    {"Records": [{"cf": {}}]},
+    {"Records": [{"cf": ""}, SQS_RECORD]},
+    {"awslogs": {}},
+    {"awslogs": {"data": 0}},
+    {"awslogs": {"data": []}},
+    {"deliveryStreamArn": "arn", "records": []},
+    {"source": "aws.events"},
+    {"source": "custom", "detail": {}},
+    {"source": "custom", "detail": ""},
+    {"methodArn": "arn", "type": "OTHER"},
+    {"methodArn": "arn", "type": "REQUEST", "httpMethod": "GET", "path": "/"},
+    {"version": "1.0", "routeKey": "GET /", "rawPath": "/", "headers": {}},
+    {"session": {"attributes": {}, "user": {}}, "request": {"requestId": "r"}},
+]
+
+
+def main():
+    process = subprocess.run(
+        ["node", os.path.join(BENCHMARKS_DIR, "detect_events.js")],
+        input=json.dumps(EVENTS).encode("utf-8"),
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    results = json.loads(process.stdout.decode("utf-8"))
+    mismatches = 0
+    for result in results:
+        event_type = detect_event_type(result["event"])[0]
+        if event_type != result["type"]:
+            mismatches += 1
+            print(
+                "JS: {}, Python: {}, event: {}".format(
+                    result["type"], event_type, json.dumps(result["event"])[:200]
+                )
+            )
+    print("{} events, {} mismatches".format(len(results), mismatches))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Per-invocation cost of building transaction tags: everything recomputed on
+every invocation (as done before static tags were cached) versus copying the
+static tags computed on cold start and overlaying the dynamic fields.
+Also times a whole transaction around an empty handler.
+"""
+import os
+import platform
+import sys
+
+from common import FakeContext, bench, make_sdk
+
+
+def legacy_tags(sdk):
+    return {
+        "appUid": sdk.app_uid,
+        "applicationName": sdk.application_name,
+        "computeCustomEnvArch": platform.architecture()[0],
+        "computeCustomEnvPlatform": sys.platform,
+        "computeCustomFunctionName": os.environ.get("AWS_LAMBDA_FUNCTION_NAME"),
+        "computeCustomFunctionVersion": os.environ.get("AWS_LAMBDA_FUNCTION_VERSION"),
+        "computeCustomInvokeId": None,
+        "computeCustomLogGroupName": os.environ.get("AWS_LAMBDA_LOG_GROUP_NAME"),
+        "computeCustomLogStreamName": os.environ.get("AWS_LAMBDA_LOG_STREAM_NAME"),
+        "computeCustomMemorySize": os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE"),
+        "computeCustomRegion": os.environ.get("AWS_REGION"),
+        "computeCustomSchemaType": "s-compute-aws-lambda",
+        "computeCustomSchemaVersion": "0.0",
+        "computeMemorySize": os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE"),
+        "computeRegion": os.environ.get("AWS_REGION"),
+        "computeRuntime": "aws.lambda.python.{}".format(sys.version.split(" ")[0]),
+        "computeType": "aws.lambda",
+        "eventCustomStage": "dev",
+        "eventSource": None,
+        "eventType": "unknown",
+        "schemaType": "s-transaction-function",
+        "schemaVersion": "0.0",
+        "serviceName": sdk.service_name,
+        "stageName": sdk.stage_name,
+        "tenantId": sdk.org_id,
+        "tenantUid": sdk.org_uid,
+        "pluginVersion": sdk.plugin_version,
+        "functionName": "benchmark",
+        "timeout": 6,
+    }
+
+
+def static_tags(sdk):
+    tags = dict(sdk.static_tags)
+    tags.update(
+        {
+            "eventSource": None,
+            "eventType": "unknown",
+            "functionName": "benchmark",
+            "timeout": 6,
+        }
+    )
+    return tags
+
+
+def main():
+    sdk = make_sdk(should_compress_logs=False)
+    assert legacy_tags(sdk) == static_tags(sdk)
+    bench("tags recomputed per invocation", lambda: legacy_tags(sdk), number=2000)
+    bench("static tags + dynamic overlay", lambda: static_tags(sdk), number=2000)
+
+    context = FakeContext()
+    handler = sdk.handler(lambda event, context: None, "benchmark", 6)
+    bench("transaction, empty handler", lambda: handler({}, context), number=500)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Per-request overhead of the WSGI route instrumentation around a minimal
+application, which records the route it matched as the framework hooks do
+(the instrumentation never resolves routes itself, so fixed paths and
+parametrized routes cost the same).
+"""
+import itertools
+
+from common import bench, make_sdk
+from serverless_sdk.frameworks import record_route, recorded_route, wsgi_wrapper
+
+
+def app(environ, start_response):
+    record_route(environ, "/users/<int:uid>")
+    start_response("200 OK", [])
+    return [b"ok"]
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+class App(object):
+    pass
+
+
+def main():
+    sdk = make_sdk()
+    wrapper = wsgi_wrapper(sdk, recorded_route, "benchmark")
+    instance = App()
+
+    ids = itertools.count()
+
+    def request(path):
+        environ = {"REQUEST_METHOD": "GET", "PATH_INFO": path}
+        return wrapper(app, instance, (environ, start_response), {})
+
+    bench("bare application", lambda: app({}, start_response), number=20000)
+    bench("instrumented, fixed path", lambda: request("/users/1"), number=20000)
+    bench(
+        "instrumented, new id per request",
+        lambda: request("/users/{}".format(next(ids))),
+        number=20000,
+    )
+
+
+if __name__ == "__main__":
+    main()
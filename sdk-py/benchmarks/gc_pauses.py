@@ -0,0 +1,28 @@
+"""
+Cost of timing garbage collections: a workload triggering many young
+generation collections, with and without the GcMonitor callback.
+"""
+import gc
+
+from common import bench
+from serverless_sdk.gc_monitor import GcMonitor
+
+
+def workload():
+    gc.enable()  # timeit disables it
+    for _ in range(20000):
+        cycle = []
+        cycle.append(cycle)
+
+
+def main():
+    bench("without callback", workload, number=20)
+    monitor = GcMonitor(allocated_blocks=True)
+    monitor.start()
+    bench("with GcMonitor callback", workload, number=20)
+    print("collections per call: {}".format(sum(monitor.collections) // 100))
+    gc.callbacks.remove(monitor.callback)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Overhead of leak detection: an allocation-heavy call without and with
+tracemalloc tracing (1 frame), and the cost of a snapshot and of comparing
+it with the previous one, which happen once every `interval` invocations.
+"""
+import tracemalloc
+
+from common import bench
+from serverless_sdk.leaks import LeakDetector, format_leak_report
+
+retained = []
+
+
+def workload():
+    items = [{"id": i, "name": str(i)} for i in range(1000)]
+    retained.append(items[0])
+    return items
+
+
+def main():
+    bench("allocations, not traced", workload, number=200)
+    detector = LeakDetector(interval=1, frames=1)
+    bench("allocations, traced", workload, number=200)
+    bench("snapshot", detector.check, number=5, repeat=3)
+    leaks = detector.check()
+    bench("compare with previous snapshot", lambda: format_leak_report(leaks), number=5)
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Compares the memory sampler with parsing the whole of /proc/meminfo on every
+invocation (as done before the sampler was introduced).
+"""
+import os
+
+from common import bench
+from serverless_sdk.memory import MemorySampler
+
+
+def legacy_meminfo():
+    if os.path.exists("/proc/meminfo"):
+        return {
+            line.split(":")[0].strip(): int(line.split(":")[1].strip().split(" kB")[0])
+            for line in open("/proc/meminfo").readlines()
+        }
+    return {}
+
+
+def main():
+    sampler = MemorySampler()
+    bench("/proc/meminfo parsed per invocation", legacy_meminfo, number=2000)
+    bench("sampler, meminfo only", sampler.read_meminfo, number=2000)
+    bench(
+        "sampler, rss + peak rss",
+        lambda: (sampler.read_rss(), sampler.read_peak_rss()),
+        number=2000,
+    )
+    bench("sampler, full sample (incl. cpus)", sampler.sample, number=2000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Per-observation cost of custom metrics, through a metric kept by the caller
+and by name, versus `tag_event` as it was used for metrics (a dict built on
+every call, keeping the last 10 tags with `list.pop(0)`).
+"""
+import json
+
+from common import bench
+from serverless_sdk.invocation import Invocation
+from serverless_sdk.metrics import Metrics
+
+
+def legacy_tag_event(event_tags, tag, value="", custom=""):
+    event_tags.append(
+        {"tagName": str(tag), "tagValue": str(value), "custom": json.dumps(custom)}
+    )
+    if len(event_tags) > 10:
+        event_tags.pop(0)
+
+
+def main():
+    metric = Metrics()
+    counter = metric.counter("counter")
+    histogram = metric.histogram("histogram")
+    invocation = Invocation(None)
+    event_tags = []
+
+    bench(
+        "legacy tag_event",
+        lambda: legacy_tag_event(event_tags, "t", 1, {"v": 1}),
+        number=100000,
+    )
+    bench("tag_event", lambda: invocation.tag_event("t", 1, {"v": 1}), number=100000)
+    bench("counter.inc()", counter.inc, number=1000000)
+    bench("metric.increment(name)", lambda: metric.increment("counter"), number=1000000)
+    bench("histogram.record(value)", lambda: histogram.record(0.25), number=1000000)
+    bench(
+        "metric.record(name, value)",
+        lambda: metric.record("histogram", 0.25),
+        number=1000000,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Overhead of the SDK per invocation, measured offline: every scenario of
+scenarios.py runs in the local Lambda emulator (emulator.py) once as the raw
+handler and once through the handler wrapper generated by `wrapPython` in
+lib/wrap.js (rendered with node), with AWS and HTTP calls going to a local
+stub server.
+
+Reports cold start, p50/p99 invocation duration, memory allocated per
+invocation and RSS growth with and without the SDK, and exits with status 1
+when an overhead exceeds the given limits, so regressions fail CI:
+
+    python benchmarks/overhead.py --max-p50-overhead-ms 2 --max-rss-growth-mb 5
+
+Scenarios needing botocore or urllib3 are skipped when they are missing.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+except ImportError:  # python < 3.7
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+
+from importlib.util import find_spec
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SDK_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# scenario (handler in scenarios.py): library it needs, if any
+SCENARIOS = {
+    "noop": None,
+    "aws_calls": "botocore",
+    "http_calls": "urllib3",
+    "error": None,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers any request with an empty JSON document, as an AWS API would"""
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are sent separately, don't wait for delayed ACKs
+    disable_nagle_algorithm = True
+    body = b"{}"
+
+    def respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.0")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.send_header("x-amzn-RequestId", "benchmark")
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    do_GET = do_POST = do_PUT = respond
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def render_handler(output_dir, scenario):
+    subprocess.check_call(
+        [
+            "node",
+            os.path.join(BENCHMARKS_DIR, "render_handler.js"),
+            output_dir,
+            "scenarios." + scenario,
+            scenario,
+        ]
+    )
+    return "s_{}.handler".format(scenario)
+
+
+def run_emulator(handler, env, args):
+    fd, report_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(BENCHMARKS_DIR, "emulator.py"),
+                handler,
+                report_path,
+                "--invocations",
+                str(args.invocations),
+                "--allocation-invocations",
+                str(args.allocation_invocations),
+            ],
+            env=env,
+            # the SDK writes transactions to stdout, as to CloudWatch logs
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        _, stderr = process.communicate()
+        if process.returncode:
+            raise RuntimeError(
+                "{} failed:\n{}".format(handler, stderr.decode("utf-8", "replace"))
+            )
+        with open(report_path) as report:
+            return json.load(report)
+    finally:
+        os.remove(report_path)
+
+
+def summarize(report):
+    durations = report["durations"]
+    allocated = report["allocatedPerInvocation"]
+    return {
+        "coldStartMs": (report["importDuration"] + report["firstInvocation"]) * 1000,
+        "p50Ms": percentile(durations, 0.5) * 1000,
+        "p99Ms": percentile(durations, 0.99) * 1000,
+        "allocatedKb": percentile(allocated, 0.5) / 1024.0 if allocated else None,
+        "rssGrowthMb": report["rssGrowth"] / 1048576.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS))
+    parser.add_argument("--invocations", type=int, default=200)
+    parser.add_argument("--allocation-invocations", type=int, default=20)
+    parser.add_argument("--max-p50-overhead-ms", type=float)
+    parser.add_argument("--max-p99-overhead-ms", type=float)
+    parser.add_argument("--max-rss-growth-mb", type=float)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    render_dir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(
+            [SDK_DIR, BENCHMARKS_DIR, render_dir]
+            + ([os.environ["PYTHONPATH"]] if os.environ.get("PYTHONPATH") else [])
+        ),
+        BENCHMARK_STUB_ENDPOINT="http://127.0.0.1:{}".format(server.server_port),
+        AWS_ACCESS_KEY_ID="benchmark",
+        AWS_SECRET_ACCESS_KEY="benchmark",
+        AWS_DEFAULT_REGION="us-east-1",
+    )
+
+    results = {}
+    failures = []
+    row = "{:<12} {:<5} {:>12} {:>10} {:>10} {:>14} {:>12}"
+    print(row.format("scenario", "", "cold start", "p50", "p99", "alloc/invoke", "RSS growth"))
+    try:
+        for scenario in args.scenarios or sorted(SCENARIOS):
+            library = SCENARIOS[scenario]
+            if library and find_spec(library) is None:
+                print("{:<12} skipped, {} is not installed".format(scenario, library))
+                continue
+            raw = summarize(run_emulator("scenarios." + scenario, env, args))
+            sdk = summarize(
+                run_emulator(render_handler(render_dir, scenario), env, args)
+            )
+            overhead = {key: sdk[key] - raw[key] for key in raw if raw[key] is not None}
+            results[scenario] = {"raw": raw, "sdk": sdk, "overhead": overhead}
+            for label, values in (("raw", raw), ("sdk", sdk), ("+", overhead)):
+                print(
+                    row.format(
+                        scenario if label == "raw" else "",
+                        label,
+                        "{:.2f} ms".format(values["coldStartMs"]),
+                        "{:.3f} ms".format(values["p50Ms"]),
+                        "{:.3f} ms".format(values["p99Ms"]),
+                        "{:.1f} KB".format(values["allocatedKb"])
+                        if values.get("allocatedKb") is not None
+                        else "-",
+                        "{:.2f} MB".format(values["rssGrowthMb"]),
+                    )
+                )
+            for key, limit in (
+                ("p50Ms", args.max_p50_overhead_ms),
+                ("p99Ms", args.max_p99_overhead_ms),
+                ("rssGrowthMb", args.max_rss_growth_mb),
+            ):
+                if limit is not None and overhead[key] > limit:
+                    failures.append(
+                        "{}: {} overhead {:.3f} over the limit of {}".format(
+                            scenario, key, overhead[key], limit
+                        )
+                    )
+    finally:
+        server.shutdown()
+        shutil.rmtree(render_dir)
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
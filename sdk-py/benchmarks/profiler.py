@@ -0,0 +1,38 @@
+"""
+Overhead of the sampling profiler on a CPU-bound invocation at several
+intervals: wall time of the invocation with and without profiling, and the
+sampling time the profiler measures itself.
+"""
+from common import bench
+from serverless_sdk.profiler import SamplingProfiler
+
+
+def work():
+    total = 0
+    for i in range(200000):
+        total += i * i
+    return total
+
+
+def nested(depth):
+    return work() if not depth else nested(depth - 1)
+
+
+def main():
+    bench("no profiler", lambda: nested(30), number=20)
+    for interval_ms in (1, 10):
+        profiler = SamplingProfiler(interval_ms=interval_ms, threshold_ms=0)
+        overheads = []
+
+        def profiled():
+            profiler.start()
+            nested(30)
+            overheads.append(profiler.stop(1000)[1])
+
+        bench("profiled every {} ms".format(interval_ms), profiled, number=20)
+        sampling = min(overheads) * 1000
+        print("{:<48} {:>12.2f} us".format("  measured sampling time", sampling))
+
+
+if __name__ == "__main__":
+    main()
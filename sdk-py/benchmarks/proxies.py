@@ -0,0 +1,73 @@
+"""
+Call overhead of the wrapt proxy around each instrumented entry point, with a
+pass-through wrapper so only the proxy layer (descriptor binding and
+`FunctionWrapper.__call__`) is measured, not the spans.
+
+Compares the vendored copy (pure Python unless its extension is built for
+this runtime) with `wrapt` installed next to it, when there is one:
+
+    pip install --target /tmp/wrapt wrapt
+    PYTHONPATH=/tmp/wrapt python benchmarks/proxies.py
+"""
+from common import bench
+from serverless_sdk.proxies import has_extension
+from serverless_sdk.vendor import wrapt as vendored_wrapt
+
+# instrumented entry point: arguments of a typical call
+ENTRY_POINTS = {
+    "botocore.client:BaseClient._make_api_call": (
+        ("GetItem", {"TableName": "table"}),
+        {},
+    ),
+    "urllib3.connectionpool:HTTPConnectionPool.urlopen": (
+        ("GET", "/path"),
+        {"body": None, "headers": None},
+    ),
+    "urllib.request:AbstractHTTPHandler.do_open": ((object, object()), {}),
+}
+
+
+def passthrough(wrapped, instance, args, kwargs):
+    return wrapped(*args, **kwargs)
+
+
+def make_stand_in(name):
+    class StandIn(object):
+        def call(self, *args, **kwargs):
+            return None
+
+    StandIn.__name__ = name
+    return StandIn
+
+
+def implementations():
+    yield "vendored " + (
+        "extension" if has_extension(vendored_wrapt) else "pure Python"
+    ), vendored_wrapt
+    try:
+        import wrapt
+    except ImportError:
+        return
+    yield "native " + (
+        "extension" if has_extension(wrapt) else "pure Python"
+    ), wrapt
+
+
+def main():
+    for target, (args, kwargs) in sorted(ENTRY_POINTS.items()):
+        print(target)
+        bare = make_stand_in(target)()
+        baseline = bench("  bare", lambda: bare.call(*args, **kwargs), number=100000)
+        for label, module in implementations():
+            stand_in = make_stand_in(target)
+            module.wrap_function_wrapper(stand_in, "call", passthrough)
+            instance = stand_in()
+            best = bench(
+                "  " + label, lambda: instance.call(*args, **kwargs), number=100000
+            )
+            overhead = (best - baseline) * 1e6
+            print("{:<48} {:>12.2f} us".format("    proxy overhead", overhead))
+
+
+if __name__ == "__main__":
+    main()
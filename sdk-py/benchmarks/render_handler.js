@@ -0,0 +1,46 @@
+'use strict';
+
+/*
+ * Renders the Python handler wrapper generated by `wrapPython` in lib/wrap.js
+ * for a benchmark function (the plugin dependencies must be installed).
+ *
+ * Usage: node render_handler.js <output dir> <module.handler> <function name> [timeout]
+ * Writes <output dir>/s_<function name>.py
+ */
+
+const [outputDir, userHandler, functionName, timeout = '6'] = process.argv.slice(2);
+if (!outputDir || !userHandler || !functionName) {
+  process.stderr.write(
+    'Usage: node render_handler.js <output dir> <module.handler> <function name> [timeout]\n'
+  );
+  process.exit(1);
+}
+
+const { wrapPython } = require('../../lib/wrap');
+
+const separator = userHandler.lastIndexOf('.');
+wrapPython(
+  {
+    name: functionName,
+    timeout: Number(timeout),
+    entryOrig: userHandler.slice(0, separator),
+    handlerOrig: userHandler.slice(separator + 1),
+    entryNew: `s_${functionName}`,
+  },
+  {
+    sls: {
+      service: {
+        org: 'org',
+        app: 'app',
+        appUid: 'app-uid',
+        orgUid: 'org-uid',
+        service: 'benchmark',
+        custom: { enterprise: {} },
+      },
+      config: { servicePath: outputDir },
+      processedInput: { commands: ['deploy'] },
+    },
+    deploymentUid: 'deployment-uid',
+    provider: { getStage: () => 'dev' },
+  }
+);
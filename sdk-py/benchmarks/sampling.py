@@ -0,0 +1,20 @@
+"""
+Per-invocation cost of a transaction around an empty handler when it is
+emitted versus when it is sampled out and folded into the summary.
+"""
+from common import FakeContext, bench, make_sdk
+from serverless_sdk.sampling import TransactionSampler
+
+
+def main():
+    context = FakeContext()
+    for label, rate in (("kept (rate 1)", 1.0), ("sampled out (rate 0)", 0.0)):
+        sdk = make_sdk()
+        sdk.sampler = TransactionSampler(rate=rate, summary_interval=60)
+        handler = sdk.handler(lambda event, context: None, "benchmark", 6)
+        handler({}, context)  # cold start, always kept
+        bench("transaction, " + label, lambda: handler({}, context), number=2000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+User handlers of the overhead benchmark scenarios, see overhead.py.
+
+AWS and HTTP calls go to the stub server at BENCHMARK_STUB_ENDPOINT. Clients
+are created on import, as functions usually do, so their setup is part of
+the cold start rather than of every invocation.
+"""
+import os
+
+STUB_ENDPOINT = os.environ.get("BENCHMARK_STUB_ENDPOINT", "http://127.0.0.1:1")
+
+AWS_CALLS = 50
+HTTP_CALLS = 1000
+
+try:
+    import botocore.session
+
+    dynamodb = botocore.session.get_session().create_client(
+        "dynamodb", region_name="us-east-1", endpoint_url=STUB_ENDPOINT
+    )
+except ImportError:
+    dynamodb = None
+
+try:
+    import urllib3
+
+    http = urllib3.PoolManager()
+except ImportError:
+    http = None
+
+
+def noop(event, context):
+    return {"statusCode": 200}
+
+
+def aws_calls(event, context):
+    for _ in range(AWS_CALLS):
+        dynamodb.get_item(TableName="benchmark", Key={"id": {"S": "1"}})
+    return {"statusCode": 200}
+
+
+def http_calls(event, context):
+    for _ in range(HTTP_CALLS):
+        http.request("GET", STUB_ENDPOINT + "/items")
+    return {"statusCode": 200}
+
+
+def error(event, context):
+    raise ValueError("benchmark error")
+
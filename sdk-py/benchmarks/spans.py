@@ -0,0 +1,61 @@
+"""
+Per-span overhead: the span as implemented before (wall clock reads and ISO
+formatting on enter/exit, dump on exit) versus the `__slots__` span recording
+monotonic timestamps and formatting them only when serialized.
+"""
+import time
+from datetime import datetime
+
+from common import bench
+from serverless_sdk.spans import Span
+
+
+class LegacySpan(object):
+    def __init__(self, emmiter, span_type):
+        self.emmiter = emmiter
+        self.span_type = span_type
+        self.tags = {}
+
+    def set_tag(self, tag, value):
+        self.tags[tag] = value
+
+    def dump(self):
+        return {
+            "tags": dict(type=self.span_type, **self.tags),
+            "startTime": self.start_isoformat,
+            "endTime": self.end_isoformat,
+            "duration": int((self.end - self.start) * 1000),
+        }
+
+    def __enter__(self):
+        self.start_isoformat = datetime.utcnow().isoformat() + "Z"
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_isoformat = datetime.utcnow().isoformat() + "Z"
+        self.end = time.time()
+        self.emmiter(self.dump())
+
+
+def record(span_class, spans):
+    with span_class(spans.append, "aws") as span:
+        span.set_tag("requestHostname", "dynamodb.us-east-1.amazonaws.com")
+        span.set_tag("aws", {"region": "us-east-1", "operation": "GetItem"})
+
+
+def main():
+    legacy_spans = []
+    spans = []
+    bench("legacy span, recorded", lambda: record(LegacySpan, legacy_spans), 10000)
+    bench("slots span, recorded", lambda: record(Span, spans), 10000)
+    # recorded spans are dumped once, when the transaction is serialized
+    bench(
+        "slots span, recorded + dumped",
+        lambda: record(Span, spans) or spans[-1].dump(),
+        10000,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Cost of capturing an exception with deep tracebacks: `traceback.extract_tb`
+with `os.path.abspath` and `json.dumps` of every frame (as done before the
+shared frame serializer) versus `capture_error`, alone (what the handler pays
+on capture) and followed by serialization (done once per transaction).
+"""
+import json
+import os
+import sys
+import traceback
+
+from common import bench
+from serverless_sdk.stacktrace import capture_error
+
+
+def legacy_capture(exception):
+    # re-raising grows the exception's traceback, keep runs comparable
+    original_traceback = exception.__traceback__
+    try:
+        raise exception
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        stack_frames = traceback.extract_tb(exc_traceback)
+        return json.dumps(
+            [
+                {
+                    "filename": frame[0],
+                    "lineno": frame[1],
+                    "function": frame[2],
+                    "library_frame": False,
+                    "abs_path": os.path.abspath(frame[0]),
+                    "pre_context": [],
+                    "context_line": frame[3],
+                    "post_context": [],
+                }
+                for frame in reversed(stack_frames)
+            ]
+        )
+    finally:
+        exception.__traceback__ = original_traceback
+
+
+def recurse(depth):
+    if depth:
+        recurse(depth - 1)
+    raise ValueError("deep")
+
+
+def deep_exception(depth):
+    try:
+        recurse(depth)
+    except ValueError as error:
+        return error
+
+
+def main():
+    sys.setrecursionlimit(5000)
+    for depth in (10, 100, 1000):
+        exception = deep_exception(depth)
+        number = 200 if depth < 1000 else 20
+        bench(
+            "legacy, depth {}".format(depth),
+            lambda: legacy_capture(exception),
+            number=number,
+        )
+        bench(
+            "capture_error, depth {}".format(depth),
+            lambda: capture_error(exception, False),
+            number=number,
+        )
+        bench(
+            "capture_error + serialize, depth {}".format(depth),
+            lambda: capture_error(exception, False)[
+                "errorExceptionStacktrace"
+            ].to_json(),
+            number=number,
+        )
+
+
+if __name__ == "__main__":
+    main()
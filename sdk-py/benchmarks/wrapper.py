@@ -0,0 +1,34 @@
+"""
+Overhead of the handler wrapper around an empty handler: the bare handler,
+the wrapper alone (transactions not emitted), the `SDK.transaction` context
+manager, and the wrapper emitting transactions.
+"""
+from common import FakeContext, bench, make_sdk
+
+
+def empty_handler(event, context):
+    return None
+
+
+def main():
+    context = FakeContext()
+    event = {}
+    bench("bare handler", lambda: empty_handler(event, context), number=20000)
+
+    sdk = make_sdk(should_log_meta=False)
+    handler = sdk.handler(empty_handler, "benchmark", 6)
+    bench("wrapper, not emitting", lambda: handler(event, context), number=5000)
+
+    def transaction():
+        with sdk.transaction(event, context, "benchmark", 6):
+            empty_handler(event, context)
+
+    bench("SDK.transaction, not emitting", transaction, number=5000)
+
+    sdk = make_sdk(should_compress_logs=False)
+    handler = sdk.handler(empty_handler, "benchmark", 6)
+    bench("wrapper, emitting", lambda: handler(event, context), number=1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,170 @@
+import inspect
 import json
 import os
 import platform
 import signal
-import threading
 import sys
+import threading
 import time
 import traceback
-import uuid
-import gzip
-import base64
 from datetime import datetime
 from contextlib import contextmanager
+from functools import partial
 from importlib import import_module
-from io import BytesIO
+
+try:
+    from types import MappingProxyType  # python 3
+except ImportError:
+    MappingProxyType = dict  # python 2
 
 try:
     from urlparse import urlparse  # python 2
 except ImportError:
     from urllib.parse import urlparse  # python 3
 
-from serverless_sdk.spans import Span
-from serverless_sdk.vendor import wrapt
+from serverless_sdk.coldstart import ColdStartProfiler
+from serverless_sdk.spans import now_ns
+
+cold_start_profiler = ColdStartProfiler.from_env()
+sdk_import_started = now_ns()
+
+from serverless_sdk.batch_records import BatchRecords
+from serverless_sdk.connections import (
+    ConnectionReuse,
+    RequestTimings,
+    current_request,
+    timed_connect,
+    timed_getresponse,
+    timed_new_conn,
+)
+from serverless_sdk.collector import (
+    bind_current_context,
+    get_current_collector,
+    reset_current_collector,
+    set_current_collector,
+)
+from serverless_sdk.emitter import TransactionEmitter
+from serverless_sdk.flusher import BackgroundFlusher
+from serverless_sdk.frameworks import (
+    django_resolve_wrapper,
+    flask_dispatch_wrapper,
+    recorded_route,
+    starlette_route,
+    wsgi_wrapper,
+)
+from serverless_sdk.gc_monitor import GcMonitor
+from serverless_sdk.hosts import HostFilter
+from serverless_sdk.invocation import Invocation, format_event_tags
+from serverless_sdk.leaks import LeakDetector, format_leak_report
+from serverless_sdk.memory import MemorySampler, format_cpus, format_memory_used
+from serverless_sdk.metrics import format_metrics, metric
+from serverless_sdk.profiler import SamplingProfiler, format_profile
+from serverless_sdk.sampling import TransactionSampler
+from serverless_sdk.proxies import wrapt, wrapt_implementation
+from serverless_sdk.spans import Span, set_clock_anchor
+from serverless_sdk.stacktrace import format_stacktrace
+from serverless_sdk.util import number_from_env
+from serverless_sdk.watchdog import TimeoutWatchdog
+
+try:
+    from serverless_sdk.frameworks_asgi import asgi_wrapper
+except SyntaxError:
+    # Python 2 doesn't support `async def`
+    asgi_wrapper = None
 
 module_start_time = time.time()
 
-capture_hosts = {}
-if "SERVERLESS_ENTERPRISE_SPANS_CAPTURE_HOSTS" in os.environ:
-    for domain in os.environ.get("SERVERLESS_ENTERPRISE_SPANS_CAPTURE_HOSTS", "").split(
-        ","
-    ):
-        if domain:
-            capture_hosts[domain.lower()] = True
-else:
-    capture_hosts["*"] = True
-ignore_hosts = {}
-if "SERVERLESS_ENTERPRISE_SPANS_IGNORE_HOSTS" in os.environ:
-    for domain in os.environ.get("SERVERLESS_ENTERPRISE_SPANS_IGNORE_HOSTS", "").split(
-        ","
-    ):
-        if domain:
-            ignore_hosts[domain] = True
-            ignore_hosts[domain.lower()] = True
+# python 2 has no coroutine functions
+iscoroutinefunction = getattr(inspect, "iscoroutinefunction", None)
+
+DEFAULT_TIMEOUT_MARGIN_MS = 50
+
+host_filter = HostFilter.from_env()
+# HTTP requests made by boto are recorded as "aws" spans, not "http" ones
+capture_aws_sdk_http = bool(
+    os.environ.get("SERVERLESS_ENTERPRISE_SPANS_CAPTURE_AWS_SDK_HTTP")
+)
+# opt-in: connection reuse, network phases and sizes of urllib3 requests
+capture_http_network = bool(
+    os.environ.get("SERVERLESS_ENTERPRISE_SPANS_CAPTURE_HTTP_NETWORK")
+)
+
+
+# error codes botocore retries as throttling, see botocore/data/_retry.json
+THROTTLING_ERROR_CODES = frozenset(
+    (
+        "BandwidthLimitExceeded",
+        "EC2ThrottledException",
+        "LimitExceededException",
+        "PriorRequestNotComplete",
+        "ProvisionedThroughputExceededException",
+        "RequestLimitExceeded",
+        "RequestThrottled",
+        "RequestThrottledException",
+        "SlowDown",
+        "ThrottledException",
+        "Throttling",
+        "ThrottlingException",
+        "TooManyRequestsException",
+        "TransactionInProgressException",
+    )
+)
+
+
+def botocore_client_meta(client, current_call):
+    """
+    (hostname, region, service) of a botocore client, which never change for
+    the client and are cached on it. Also hooks the client's events to count
+    the request body size and throttled attempts of its calls into the
+    `stats` ([request body size, throttled attempts]) of `current_call`.
+    """
+
+    def before_send(request=None, **kwargs):
+        stats = getattr(current_call, "stats", None)
+        if stats is None or request is None:
+            return
+        body = request.body
+        size = request.headers.get("Content-Length")
+        if size is not None:
+            stats[0] = int(size)
+        elif body is None:
+            stats[0] = 0
+        elif isinstance(body, (bytes, str)):
+            stats[0] = len(body)
+
+    def needs_retry(response=None, **kwargs):
+        stats = getattr(current_call, "stats", None)
+        if stats is None or not response:
+            return
+        error = response[1].get("Error") or {}
+        if error.get("Code") in THROTTLING_ERROR_CODES:
+            stats[1] += 1
+
+    events = client.meta.events
+    events.register("before-send", before_send, "serverless-sdk-before-send")
+    events.register("needs-retry", needs_retry, "serverless-sdk-needs-retry")
+    return (
+        client._endpoint.host.split("://")[1],
+        client.meta.region_name,
+        client._service_model.service_name,
+    )
+
+
+@contextmanager
+def cold_start_phase(name):
+    if cold_start_profiler is None:
+        yield
+        return
+    with cold_start_profiler.phase(name):
+        yield
 
 
 def get_user_handler(user_handler_value):
+    with cold_start_phase("userImport"):
+        return _get_user_handler(user_handler_value)
+
+
+def _get_user_handler(user_handler_value):
     orig_path = sys.path
     if "/" in user_handler_value:
         user_module_path, user_module_and_handler = user_handler_value.rsplit(
@@ -60,35 +181,46 @@ def get_user_handler(user_handler_value):
     return getattr(user_module, user_handler_name)
 
 
-# will be replaced by real exception capture and span func in SDK.transaction
-def _capture_exception(x): return None
-
-
-def _span(x): return x
+# the invocation of the SDK wrapping the handler, set in SDK.__init__
+_invocation = None
 
 
 def capture_exception(exception):
-    _capture_exception(exception)
+    if _invocation is not None:
+        _invocation.capture_exception(exception)
 
 
 def tag_event(tag, value='', custom=''):
-    _tag_event(tag, value, custom)
+    if _invocation is not None:
+        _invocation.tag_event(tag, value, custom)
 
 
 def span(span_type):
-    return _span(span_type)
+    if _invocation is None:
+        return span_type
+    return _invocation.span(span_type)
+
+
+def batch(event):
+    if _invocation is None:
+        # still iterable and answering partial batch responses, just not reported
+        return BatchRecords(event)
+    return _invocation.batch(event)
 
 
 def set_endpoint(endpoint, http_method=None, http_status_code=None, meta=None):
-    _set_endpoint(endpoint, http_method=http_method, http_status_code=http_status_code, meta=meta)
+    if _invocation is not None:
+        _invocation.set_endpoint(
+            endpoint, http_method=http_method, http_status_code=http_status_code, meta=meta
+        )
 
 
 def get_transaction_id():
-    return _get_transaction_id()
+    return _invocation.get_transaction_id()
 
 
 def get_dashboard_url(transaction_id=None):
-    return _get_dashboard_url(transaction_id)
+    return _invocation.get_dashboard_url(transaction_id)
 
 
 class SDK(object):
@@ -109,6 +241,8 @@ class SDK(object):
         disable_frameworks_instrumentation,
         serverless_platform_stage,
     ):
+        init_started = time.time()
+        init_started_ns = now_ns()
         self.org_id = org_id
         self.application_name = application_name
         self.app_uid = app_uid
@@ -123,226 +257,148 @@ class SDK(object):
         self.plugin_version = plugin_version
         self.serverless_platform_stage = serverless_platform_stage
         self.invokation_count = 0
-        self.spans = []
-        self.event_tags = []
-        self.endpoint = None
-        self.http_method = None
-        self.http_status_code = None
-        self.endpoint_meta = None
-
-        self.instrument_botocore()
-        self.instrument_urllib3()
-        self.instrument_stdlib_urllib("urllib.request")
-        self.instrument_stdlib_urllib("urllib2")
+        self.invocation = Invocation(self)
+        global _invocation
+        _invocation = self.invocation
+        self.event_loop = None
+        self.static_tags = self.build_static_tags()
+        self.memory_sampler = MemorySampler()
+        self.connection_reuse = ConnectionReuse()
+        self.emitter = TransactionEmitter(compress=should_compress_logs)
+        self.sampler = TransactionSampler()
+        # opt-in: CPU profile of slow invocations
+        self.profiler = SamplingProfiler.from_env()
+        # opt-in: garbage collection pauses per invocation
+        self.gc_monitor = GcMonitor.from_env()
+        # opt-in, in a fraction of containers: memory retained across invocations
+        self.leak_detector = LeakDetector.from_env()
+        # opt-in: serialize and emit transactions off the response path
+        self.flusher = (
+            BackgroundFlusher()
+            if os.environ.get("SERVERLESS_ENTERPRISE_ASYNC_FLUSH")
+            else None
+        )
+
+        self.timeout_margin = self.resolve_timeout_margin()
+        self.timeout_handler = None
+        self.watchdog = TimeoutWatchdog()
+        self.chained_sigterm_handler = None
+        self.install_sigterm_handler()
+
+        self.instrumentation = {}
+        with cold_start_phase("instrument_botocore"):
+            self.instrument_botocore()
+        if not disable_http_spans:
+            with cold_start_phase("instrument_urllib3"):
+                self.instrument_urllib3()
+            with cold_start_phase("instrument_stdlib_urllib"):
+                self.instrument_stdlib_urllib("urllib.request")
+                self.instrument_stdlib_urllib("urllib2")
+        with cold_start_phase("instrument_threads"):
+            self.instrument_threads()
 
         if not disable_frameworks_instrumentation:
-            self.instrument_flask("flask")
+            with cold_start_phase("instrument_frameworks"):
+                self.instrument_frameworks()
+        self.init_duration = (time.time() - init_started) * 1000
+        if cold_start_profiler:
+            cold_start_profiler.add_phase("sdkInit", init_started_ns, now_ns())
 
     def handler(self, user_handler, function_name, timeout):
+        if iscoroutinefunction is not None and iscoroutinefunction(user_handler):
+            # Lambda only calls plain functions, run async handlers to completion
+            def call_handler(event, context):
+                return self.run_coroutine(user_handler(event, context))
+
+        else:
+            call_handler = user_handler
+        invocation = self.invocation
+
+        # same as `with self.transaction(...)`, without a generator per invocation
         def wrapped_handler(event, context):
-            with self.transaction(event, context, function_name, timeout):
-                return user_handler(event, context)
+            self.start_transaction(event, context, function_name, timeout)
+            try:
+                return call_handler(event, context)
+            except Exception as exc:
+                invocation.capture_fatal_exception(exc, sys.exc_info()[2])
+            finally:
+                try:
+                    self.end_transaction()
+                finally:
+                    reset_current_collector(invocation.collector_token)
 
         return wrapped_handler
 
-    def span(self, span_type):
+    def run_coroutine(self, coroutine):
         """
-        A wrapper around the Span context manager that sets the emitter to be
-        appending to self.spans
+        Runs `coroutine` on an event loop kept for the life of the container,
+        so loop-bound resources (e.g. client sessions) survive invocations
         """
-        return Span(self.spans.append, span_type)
+        import asyncio
+
+        if self.event_loop is None or self.event_loop.is_closed():
+            self.event_loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.event_loop)
+        return self.event_loop.run_until_complete(coroutine)
+
+    @staticmethod
+    def resolve_timeout_margin():
+        """Seconds before the timeout at which a timeout transaction is reported"""
+        return (
+            number_from_env(
+                "SERVERLESS_ENTERPRISE_TIMEOUT_MARGIN_MS", DEFAULT_TIMEOUT_MARGIN_MS
+            )
+            / 1000.0
+        )
 
-    def user_span(self, span_type):
+    def install_sigterm_handler(self):
         """
-        A wrapper around the Span context manager that sets the emitter to be
-        appending to self.spans and sets span type to custom and the user
-        specified span type as the label tag.
+        Handles SIGTERM with `handle_sigterm`, chaining the handler set in its
+        place (e.g. by the user's code, imported after the SDK) if any.
+        False if it can't be, as only the main thread can set signal handlers.
         """
-        span = Span(self.spans.append, "custom")
-        span.set_tag("label", span_type)
-        return span
-
-    @contextmanager
-    def transaction(self, event, context, function_name, timeout):
-        start = time.time()
-        if self.invokation_count > 0:  # reset spans when not a cold start
-            self.spans = []
-            self.event_tags = []
-            self.endpoint = None
-        start_isoformat = datetime.utcnow().isoformat() + "Z"
-        exception = None
-        error_data = {
-            "errorCulprit": None,
-            "errorExceptionMessage": None,
-            "errorExceptionStacktrace": None,
-            "errorExceptionType": None,
-            "errorId": None,
-            "errorFatal": None,
-        }
-
-        def capture_exception(exception):
+        handler = signal.getsignal(signal.SIGTERM)
+        # a bound method is a new object on every access, compare by equality
+        if handler == self.handle_sigterm:
+            return True
+        try:
+            signal.signal(signal.SIGTERM, self.handle_sigterm)
+        except ValueError:
+            return False  # not on the main thread, e.g. in tests
+        # SIG_DFL and SIG_IGN are not callable, nor None (set outside python)
+        self.chained_sigterm_handler = handler if callable(handler) else None
+        return True
+
+    def handle_sigterm(self, signum, frame):
+        if self.flusher:
+            self.flusher.flush()
+        timeout_handler = self.timeout_handler
+        if timeout_handler:
+            timeout_handler()
+        # the process is about to be killed (timeout or shutdown of the
+        # container), don't lose the transactions sampled out so far
+        summary = self.sampler.pop_summary(force=True) if self.should_log_meta else None
+        if summary:
+            self.submit(lambda: self.emit_summary(summary), wait=True)
+        chained_sigterm_handler = self.chained_sigterm_handler
+        if chained_sigterm_handler:
+            # it may chain this handler in turn, only call it once
+            self.chained_sigterm_handler = None
             try:
-                raise exception
-            except Exception as exc:
-                exception = exc
-                exc_type, exc_value, exc_traceback = sys.exc_info()
-                stack_frames = traceback.extract_tb(exc_traceback)
-                error_data["errorCulprit"] = "{} ({})".format(
-                    stack_frames[-1][2], stack_frames[-1][0]
-                )
-                error_data["errorExceptionMessage"] = str(exc_value)
-                error_data["errorExceptionStacktrace"] = json.dumps(
-                    [
-                        {
-                            "filename": frame[0],
-                            "lineno": frame[1],
-                            "function": frame[2],
-                            "library_frame": False,
-                            "abs_path": os.path.abspath(frame[0]),
-                            "pre_context": [],
-                            "context_line": frame[3],
-                            "post_context": [],
-                        }
-                        for frame in reversed(stack_frames)
-                    ]
-                )
-                error_data["errorExceptionType"] = exc_type.__name__
-                error_data["errorFatal"] = False
-                error_data["errorId"] = "{}!${}".format(
-                    exc_type.__name__, str(exc_value)[:200]
-                )
+                chained_sigterm_handler(signum, frame)
+            finally:
+                self.chained_sigterm_handler = chained_sigterm_handler
 
-        def tag_event(tag, value='', custom=''):
-            self.event_tags.append(
-                {'tagName': str(tag), 'tagValue': str(value), 'custom': json.dumps(custom)})
-            if len(self.event_tags) > 10:
-                self.event_tags.pop(0)
-
-        def set_endpoint(endpoint, http_method=None, http_status_code=None, meta=None):
-            if endpoint: self.endpoint = endpoint
-            if http_method: self.http_method = http_method
-            if http_status_code: self.http_status_code = str(http_status_code)
-            self.endpoint_meta = meta
-
-        is_custom_authorizer = "methodArn" in event and event.get("type") in (
-            "TOKEN",
-            "REQUEST",
-        )
-        is_apig = (
-            all(
-                key in event
-                for key in [
-                    "path",
-                    "headers",
-                    "requestContext",
-                    "resource",
-                    "httpMethod",
-                ]
-            )
-            and "requestId" in event["requestContext"]
-        )
-        if not is_custom_authorizer and is_apig:
-            # For APIGW access logs
-            span_id = event["requestContext"]["requestId"]
-        else:
-            span_id = str(uuid.uuid4())
-
-        def get_transaction_id():
-            return span_id
-
-        def get_dashboard_url(transaction_id=None):
-            domain = "serverless" if self.serverless_platform_stage == "prod" else "serverless-dev"
-            return "/".join([
-              "https://app.{}.com".format(domain),
-              self.org_id,
-              "apps",
-              self.application_name,
-              self.service_name,
-              self.stage_name,
-              os.environ.get("AWS_REGION"),
-              "explorer",
-              span_id if transaction_id is None else transaction_id,
-            ])
-
-        class SDK_METHOD_WRAPPER:
-            def __init__(self, capture_exception, tag_event, span, set_endpoint, get_transaction_id):
-                self.capture_exception = capture_exception
-                self.tag_event = tag_event
-                self.span = span
-                self.set_endpoint = set_endpoint
-                self.get_transaction_id = get_transaction_id
-                self.get_dashboard_url = get_dashboard_url
-
-        global _capture_exception
-        _capture_exception = capture_exception
-        context.capture_exception = capture_exception
-
-        global _tag_event
-        _tag_event = tag_event
-
-        global _span
-        _span = self.user_span
-        context.span = self.user_span
-
-        global _set_endpoint
-        _set_endpoint = set_endpoint
-
-        global _get_transaction_id
-        _get_transaction_id = get_transaction_id
-
-        global _get_dashboard_url
-        _get_dashboard_url = get_dashboard_url
-
-        context.serverless_sdk = SDK_METHOD_WRAPPER(
-            capture_exception, tag_event, span, set_endpoint, get_transaction_id)
-
-        # handle getting a SIGTERM, which represents an imminent timeout
-        def sigterm_handler(signal, frame):
-            error_data["errorCulprit"] = "timeout"
-            error_data["errorExceptionMessage"] = "Function execution duration going to exceeded configured timeout limit."
-            error_data["errorExceptionStacktrace"] = "[]"
-            error_data["errorExceptionType"] = "TimeoutError"
-            error_data["errorFatal"] = True
-            error_data["errorId"] = "TimeoutError!$Function execution duration going to exceeded configured timeout limit."
-            finalize()
-
-        signal.signal(signal.SIGTERM, sigterm_handler)
-
-        # create a thread to SIGTERM self right before timeout
-        def sigterm_sender():
-            os.kill(os.getpid(), signal.SIGTERM)
-
-        sigterm_timer = threading.Timer(timeout - 0.05, sigterm_sender)
-        sigterm_timer.start()
-
-        def finalize():
-            sigterm_timer.cancel()
-            if os.path.exists("/proc/meminfo"):
-                meminfo = {
-                    line.split(":")[0].strip(): int(
-                        line.split(":")[1].strip().split(" kB")[0]
-                    )
-                    for line in open("/proc/meminfo").readlines()
-                }
-            else:
-                meminfo = {}
-            self.invokation_count += 1
-            end_isoformat = datetime.utcnow().isoformat() + "Z"
-            tags = {
+    def build_static_tags(self):
+        """
+        Transaction tags which do not change for the life of the container,
+        computed once on cold start instead of on every invocation
+        """
+        return MappingProxyType(
+            {
                 "appUid": self.app_uid,
                 "applicationName": self.application_name,
-                "computeContainerUptime": (time.time() - module_start_time) * 1000,
-                "computeCustomArn": context.invoked_function_arn,
-                "computeCustomAwsRequestId": context.aws_request_id,
                 "computeCustomEnvArch": platform.architecture()[0],
-                # TODO '[{"model":"Intel(R) Xeon(R) Processor @ 2.50GHz","speed":2500,"times":{"user":2200,"nice":0,"sys":2300,"idle":8511300,"irq":0}},{"model":"Intel(R) Xeon(R) Processor @ 2.50GHz","speed":2500,"times":{"user":1200,"nice":0,"sys":1700,"idle":8513400,"irq":0}}]',
-                "computeCustomEnvCpus": None,
-                "computeCustomEnvMemoryFree": meminfo.get("MemFree") * 1024
-                if meminfo
-                else None,
-                "computeCustomEnvMemoryTotal": meminfo.get("MemTotal") * 1024
-                if meminfo
-                else None,
                 "computeCustomEnvPlatform": sys.platform,
                 "computeCustomFunctionName": os.environ.get("AWS_LAMBDA_FUNCTION_NAME"),
                 "computeCustomFunctionVersion": os.environ.get(
@@ -361,28 +417,13 @@ class SDK(object):
                 "computeCustomRegion": os.environ.get("AWS_REGION"),
                 "computeCustomSchemaType": "s-compute-aws-lambda",
                 "computeCustomSchemaVersion": "0.0",
-                "computeCustomXTraceId": os.environ.get("_X_AMZN_TRACE_ID"),
-                "computeInstanceInvocationCount": self.invokation_count,
-                "computeIsColdStart": self.invokation_count == 1,
-                "computeMemoryPercentageUsed": (
-                    meminfo["MemTotal"] - meminfo["MemFree"]
-                )
-                / meminfo["MemTotal"]
-                if meminfo
-                else None,
                 "computeMemorySize": os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE"),
-                # '{"rss":35741696,"heapTotal":11354112,"heapUsed":7258288,"external":8636}',
-                "computeMemoryUsed": None,
                 "computeRegion": os.environ.get("AWS_REGION"),
                 "computeRuntime": "aws.lambda.python.{}".format(
                     sys.version.split(" ")[0]
                 ),
                 "computeType": "aws.lambda",
                 "eventCustomStage": "dev",
-                "eventSource": None,
-                "eventTimestamp": start_isoformat,
-                "eventType": "unknown",
-                "functionName": function_name,
                 "schemaType": "s-transaction-function",
                 "schemaVersion": "0.0",
                 "serviceName": self.service_name,
@@ -390,123 +431,429 @@ class SDK(object):
                 "tenantId": self.org_id,
                 "tenantUid": self.org_uid,
                 "pluginVersion": self.plugin_version,
-                "timeout": timeout,
-                "timestamp": start_isoformat,
-                "traceId": context.aws_request_id,
-                "transactionId": span_id,
-                "endpoint": self.endpoint,
-                "httpMethod": self.http_method,
-                "httpStatusCode": self.http_status_code,
-                "endpointMechanism": self.endpoint_meta["mechanism"] if self.endpoint_meta else "explicit",
-            }
-            tags.update(error_data)
-            if error_data["errorExceptionType"] == "TimeoutError":
-                transaction_type = "report"
-            elif error_data["errorId"]:
-                transaction_type = "error"
-            else:
-                transaction_type = "transaction"
-            transaction_data = {
-                "type": transaction_type,
-                "origin": "sls-agent",
-                "payload": {
-                    "duration": (time.time() - start) * 1000,
-                    "endTime": end_isoformat,
-                    "logs": {},
-                    "operationName": "s-transaction-function",
-                    "schemaType": "s-span",
-                    "schemaVersion": "0.0",
-                    "spanContext": {
-                        "spanId": span_id,
-                        "traceId": context.aws_request_id,
-                        "xTraceId": os.environ.get("_X_AMZN_TRACE_ID"),
-                    },
-                    # Limit spans to only the first 50
-                    "spans": self.spans[:50],
-                    "eventTags": self.event_tags,
-                    "startTime": start_isoformat,
-                    "tags": tags,
-                },
-                "requestId": context.aws_request_id,
-                "schemaVersion": "0.0",
-                "timestamp": end_isoformat,
             }
+        )
+
+    def span(self, span_type):
+        """
+        A wrapper around the Span context manager that sets the emitter to be
+        appending to the span collector of the current invocation
+        """
+        return Span(self.span_collector().append, span_type)
 
-            if exception and error_data["errorFatal"]:
-                raise exception
+    def span_collector(self):
+        """
+        Collector of the invocation the caller belongs to: the one recorded in
+        the caller's context if any (asyncio tasks), else the current one
+        """
+        return get_current_collector() or self.invocation.spans
 
+    def user_span(self, span_type, collector=None):
+        """
+        A wrapper around the Span context manager that sets the emitter to be
+        appending to the span collector (by default the current one) and sets
+        span type to custom and the user specified span type as the label tag.
+        """
+        span = Span((collector or self.span_collector()).append, "custom")
+        span.set_tag("label", span_type)
+        return span
+
+    @contextmanager
+    def transaction(self, event, context, function_name, timeout):
+        self.start_transaction(event, context, function_name, timeout)
         try:
             yield
         except Exception as exc:
-            exception = exc
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            stack_frames = traceback.extract_tb(exc_traceback)
-            error_data["errorCulprit"] = "{} ({})".format(
-                stack_frames[-1][2], stack_frames[-1][0]
+            self.invocation.capture_fatal_exception(exc, sys.exc_info()[2])
+        finally:
+            try:
+                self.end_transaction()
+            finally:
+                reset_current_collector(self.invocation.collector_token)
+
+    def start_transaction(self, event, context, function_name, timeout):
+        start = time.time()
+        set_clock_anchor()
+        if self.flusher:
+            # emit anything left over from the previous (frozen) invocation
+            self.flusher.flush()
+        invocation = self.invocation
+        invocation.reset(
+            event,
+            context,
+            function_name,
+            timeout,
+            start,
+            datetime.utcnow().isoformat() + "Z",
+        )
+        invocation.collector_token = set_current_collector(invocation.spans)
+        context.capture_exception = invocation.capture_exception
+        # spans made through the context belong to this invocation, even when
+        # opened from threads outliving it
+        context.span = partial(self.user_span, collector=invocation.spans)
+        context.serverless_sdk = invocation
+
+        self.timeout_handler = self.handle_timeout
+        # SIGTERM self right before timeout, based on the actual remaining time
+        # (the function timeout may have been changed since deployment)
+        try:
+            remaining_time = context.get_remaining_time_in_millis() / 1000.0
+        except AttributeError:
+            remaining_time = timeout
+        if self.profiler:
+            self.profiler.start()
+        if self.gc_monitor:
+            self.gc_monitor.start()
+        # last, so the SIGTERM doesn't interrupt the SDK holding a lock.
+        # Without our handler (e.g. replaced by the user's code and not
+        # settable from this thread), the SIGTERM would kill the process
+        if self.install_sigterm_handler():
+            self.watchdog.arm(remaining_time - self.timeout_margin)
+
+    def handle_timeout(self):
+        # getting a SIGTERM represents an imminent timeout
+        self.invocation.capture_timeout()
+        # in the signal handler, the interrupted frame may hold any lock
+        self.end_transaction(blocking=False)
+
+    def end_transaction(self, blocking=True):
+        invocation = self.invocation
+        if invocation.processed:
+            # already ended on timeout, only fail the same way as the handler
+            if invocation.exception and invocation.error_data["errorFatal"]:
+                raise invocation.exception
+            return
+        invocation.processed = True
+        self.watchdog.disarm()
+        self.timeout_handler = None
+        self.invokation_count += 1
+        error_data = invocation.error_data
+        # the process is about to be killed on timeout, emit right away
+        timed_out = error_data["errorExceptionType"] == "TimeoutError"
+        duration = (time.time() - invocation.start) * 1000
+        profile = profiler_overhead = None
+        if self.profiler:
+            profile, profiler_overhead = self.profiler.stop(duration)
+        gc_stats = self.gc_monitor.stop(invocation.spans) if self.gc_monitor else None
+        leaks = self.leak_detector.check() if self.leak_detector else None
+
+        sampling_decision = None
+        if self.should_log_meta and self.sampler.enabled:
+            sampling_decision = self.sampler.decide(
+                duration,
+                always=bool(error_data["errorId"])
+                or self.invokation_count == 1
+                or leaks is not None,
             )
-            error_data["errorExceptionMessage"] = str(exc_value)
-            error_data["errorExceptionStacktrace"] = json.dumps(
-                [
-                    {
-                        "filename": frame[0],
-                        "lineno": frame[1],
-                        "function": frame[2],
-                        "library_frame": False,
-                        "abs_path": os.path.abspath(frame[0]),
-                        "pre_context": [],
-                        "context_line": frame[3],
-                        "post_context": [],
-                    }
-                    for frame in reversed(stack_frames)
-                ]
+            summary = self.sampler.pop_summary()
+            if summary:
+                self.submit(lambda: self.emit_summary(summary), wait=timed_out)
+            if sampling_decision is None:
+                # metrics and connection reuse add up until a kept transaction
+                invocation.spans.close()
+                return
+
+        # snapshot everything the next invocation resets or overrides
+        transaction_state = {
+            "context": invocation.context,
+            "function_name": invocation.function_name,
+            "timeout": invocation.timeout,
+            "span_id": invocation.span_id,
+            "event_type": invocation.event_type,
+            "event_source": invocation.event_source,
+            "start_isoformat": invocation.start_isoformat,
+            "duration": duration,
+            "sampling_decision": sampling_decision,
+            "profile": profile,
+            "profiler_overhead": profiler_overhead,
+            "gc_stats": gc_stats,
+            "leaks": leaks,
+            "end_isoformat": datetime.utcnow().isoformat() + "Z",
+            "container_uptime": (time.time() - module_start_time) * 1000,
+            "invokation_count": self.invokation_count,
+            "x_trace_id": os.environ.get("_X_AMZN_TRACE_ID"),
+            "spans": invocation.spans.close(),
+            "event_tags": invocation.event_tags,
+            "metrics": metric.collect(blocking),
+            "endpoint": invocation.endpoint,
+            "http_method": invocation.http_method,
+            "http_status_code": invocation.http_status_code,
+            "endpoint_meta": invocation.endpoint_meta,
+            "error_data": dict(error_data),
+            "batch_records": invocation.batch_records.close(error_data["errorFatal"])
+            if invocation.batch_records
+            else None,
+            "memory": self.memory_sampler.sample() if self.should_log_meta else None,
+            "connection_reuse": self.connection_reuse.pop(blocking)
+            if capture_http_network
+            else None,
+            "cold_start_spans": cold_start_profiler.spans()
+            if cold_start_profiler and self.invokation_count == 1
+            else [],
+        }
+
+        if self.should_log_meta:
+            self.submit(
+                lambda: self.emit_transaction(transaction_state), wait=timed_out
             )
-            error_data["errorExceptionType"] = exc_type.__name__
-            error_data["errorFatal"] = True
-            error_data["errorId"] = "{}!${}".format(
-                exc_type.__name__, str(exc_value)[:200]
+
+        if invocation.exception and error_data["errorFatal"]:
+            raise invocation.exception
+
+    def submit(self, emit, wait=False):
+        """
+        Runs `emit` on the flusher if there is one (unless `wait`), else right
+        away. Telemetry never fails the invocation, errors are only logged.
+        """
+        if self.flusher and not wait:
+            self.flusher.submit(emit)
+            return
+        try:
+            emit()
+        except Exception:
+            sys.stderr.write(
+                "serverless_sdk: failed to emit transaction\n{}".format(
+                    traceback.format_exc()
+                )
             )
-        finally:
-            finalize()
+
+    def emit_summary(self, summary):
+        """Emits the summary of the transactions sampled out, see TransactionSampler"""
+        summary = dict(summary)
+        for key in ("startTime", "endTime"):
+            summary[key] = datetime.utcfromtimestamp(summary[key]).isoformat() + "Z"
+        summary.update(
+            {
+                "functionName": self.static_tags["computeCustomFunctionName"],
+                "operationName": "s-transaction-function",
+                "schemaType": "s-transaction-summary",
+                "schemaVersion": "0.0",
+                "tags": dict(self.static_tags),
+            }
+        )
+        self.emitter.emit(
+            {
+                "type": "transaction-summary",
+                "origin": "sls-agent",
+                "payload": summary,
+                "schemaVersion": "0.0",
+                "timestamp": summary["endTime"],
+            }
+        )
+
+    def emit_transaction(self, state):
+        context = state["context"]
+        start_isoformat = state["start_isoformat"]
+        span_id = state["span_id"]
+        memory = state["memory"]
+        span_aggregates = state["spans"].aggregates()
+        error_data = state["error_data"]
+        endpoint_meta = state["endpoint_meta"]
+        tags = dict(self.static_tags)
+        tags.update(
+            {
+                "computeContainerUptime": state["container_uptime"],
+                "computeCustomArn": context.invoked_function_arn,
+                "computeCustomAwsRequestId": context.aws_request_id,
+                "computeCustomEnvCpus": format_cpus(memory),
+                "computeCustomEnvMemoryFree": memory["memory_free"],
+                "computeCustomEnvMemoryTotal": memory["memory_total"],
+                "computeCustomXTraceId": state["x_trace_id"],
+                "computeInstanceInvocationCount": state["invokation_count"],
+                "computeIsColdStart": state["invokation_count"] == 1,
+                "computeMemoryPercentageUsed": (
+                    memory["memory_total"] - memory["memory_free"]
+                )
+                / memory["memory_total"]
+                if memory["memory_total"]
+                else None,
+                "computeMemoryUsed": format_memory_used(memory),
+                # how much of the cold start is on the SDK, see import_report
+                "sdkImportReport": json.dumps(self.import_report())
+                if state["invokation_count"] == 1
+                else None,
+                # per record durations and failures, see BatchRecords
+                "batchRecords": json.dumps(state["batch_records"])
+                if state["batch_records"]
+                else None,
+                # requests per host over new and reused connections
+                "httpConnectionReuse": json.dumps(state["connection_reuse"])
+                if state["connection_reuse"]
+                else None,
+                # where the CPU time of slow invocations went, see SamplingProfiler
+                "cpuProfile": json.dumps(format_profile(state["profile"]))
+                if state["profile"]
+                else None,
+                "cpuProfilerOverheadMs": state["profiler_overhead"],
+                # garbage collection pauses and counts, see GcMonitor
+                "gcStats": json.dumps(state["gc_stats"]) if state["gc_stats"] else None,
+                # allocation sites growing across invocations, see LeakDetector
+                "memoryLeaks": json.dumps(format_leak_report(state["leaks"]))
+                if state["leaks"]
+                else None,
+                # spans over the span store capacity, see SpanStore
+                "spanAggregates": json.dumps(span_aggregates)
+                if span_aggregates
+                else None,
+                # why the transaction was kept when sampling, see TransactionSampler
+                "samplingDecision": state["sampling_decision"],
+                "eventSource": state["event_source"],
+                "eventType": state["event_type"] or "unknown",
+                "eventTimestamp": start_isoformat,
+                "functionName": state["function_name"],
+                "timeout": state["timeout"],
+                "timestamp": start_isoformat,
+                "traceId": context.aws_request_id,
+                "transactionId": span_id,
+                "endpoint": state["endpoint"],
+                "httpMethod": state["http_method"],
+                "httpStatusCode": state["http_status_code"],
+                "endpointMechanism": endpoint_meta["mechanism"] if endpoint_meta else "explicit",
+            }
+        )
+        tags.update(error_data)
+        tags["errorExceptionStacktrace"] = format_stacktrace(
+            error_data["errorExceptionStacktrace"]
+        )
+        if error_data["errorExceptionType"] == "TimeoutError":
+            transaction_type = "report"
+        elif error_data["errorId"]:
+            transaction_type = "error"
+        else:
+            transaction_type = "transaction"
+        transaction_data = {
+            "type": transaction_type,
+            "origin": "sls-agent",
+            "payload": {
+                "duration": state["duration"],
+                "endTime": state["end_isoformat"],
+                "logs": {},
+                "operationName": "s-transaction-function",
+                "schemaType": "s-span",
+                "schemaVersion": "0.0",
+                "spanContext": {
+                    "spanId": span_id,
+                    "traceId": context.aws_request_id,
+                    "xTraceId": state["x_trace_id"],
+                },
+                "spans": [
+                    span.dump()
+                    for span in state["spans"].spans() + state["cold_start_spans"]
+                ],
+                "eventTags": format_event_tags(state["event_tags"]),
+                "metrics": format_metrics(state["metrics"]),
+                "startTime": start_isoformat,
+                "tags": tags,
+            },
+            "requestId": context.aws_request_id,
+            "schemaVersion": "0.0",
+            "timestamp": state["end_isoformat"],
+        }
+
+        self.emitter.emit(transaction_data)
+
+    def wrap_on_import(self, module, name, wrapper):
+        """
+        Wraps `module.name` with `wrapper` once `module` gets imported (right
+        away if it already is), so instrumenting a library never imports it.
+        Time spent patching is recorded in `self.instrumentation`.
+        """
+        target = "{}:{}".format(module, name)
+        self.instrumentation[target] = None
+
+        def patch(imported_module):
+            started = time.time()
+            try:
+                with cold_start_phase("patch {}".format(target)):
+                    wrapt.wrap_function_wrapper(imported_module, name, wrapper)
+            except Exception as error:
+                # never break the import of a user dependency
+                self.instrumentation[target] = {"error": str(error)}
+                return
+            self.instrumentation[target] = {
+                "patchDuration": (time.time() - started) * 1000
+            }
+
+        wrapt.register_post_import_hook(patch, module)
+
+    def import_report(self):
+        """
+        Cold start cost of the SDK: duration of `SDK.__init__` and, for every
+        instrumented library, whether it was imported and how long patching it
+        took (libraries that are never imported cost nothing), and the wrapt
+        implementation wrapping them, see proxies.load_wrapt
+        """
+        return {
+            "initDuration": self.init_duration,
+            "instrumentation": dict(self.instrumentation),
+            "wrapt": wrapt_implementation,
+        }
 
     def instrument_botocore(self):
+        # stats of the API call in progress on the thread, see botocore_call_stats
+        current_call = threading.local()
+
         def wrapper(wrapped, instance, args, kwargs):
-            if (
-                not self.disable_aws_spans
-            ):
-                with self.span("aws") as span:
-                    try:
-                        response = wrapped(*args, **kwargs)
-                        return response
-                    except Exception as error:
-                        response = getattr(error, "response", {})
-                        raise error
-                    finally:
-                        span.set_tag(
-                            "requestHostname", instance._endpoint.host.split(
-                                "://")[1]
-                        )
-                        span.set_tag(
-                            "aws",
-                            {
-                                "region": instance.meta.region_name,
-                                "service": instance._service_model.service_name,
-                                "operation": args[0],
-                                "requestId": response.get("ResponseMetadata", {}).get(
-                                    "RequestId"
-                                ),
-                                "errorCode": response.get("Error", {}).get("Code"),
-                            },
-                        )
+            if self.disable_aws_spans:
+                return wrapped(*args, **kwargs)
+            try:
+                client_meta = instance._serverless_sdk_meta
+            except AttributeError:
+                client_meta = instance._serverless_sdk_meta = botocore_client_meta(
+                    instance, current_call
+                )
+            hostname, region, service = client_meta
+            # a nested call (e.g. from an event hook) must not end the outer's
+            outer_stats = getattr(current_call, "stats", None)
+            call_stats = current_call.stats = [None, 0]
+            response = {}
+            with self.span("aws") as span:
+                try:
+                    response = wrapped(*args, **kwargs)
+                    return response
+                except Exception as error:
+                    response = getattr(error, "response", None) or {}
+                    raise error
+                finally:
+                    current_call.stats = outer_stats
+                    metadata = response.get("ResponseMetadata") or {}
+                    headers = metadata.get("HTTPHeaders") or {}
+                    response_size = headers.get("content-length")
+                    span.set_tag("requestHostname", hostname)
+                    span.set_tag(
+                        "aws",
+                        {
+                            "region": region,
+                            "service": service,
+                            "operation": args[0],
+                            "requestId": metadata.get("RequestId"),
+                            "errorCode": response.get("Error", {}).get("Code"),
+                            "retryAttempts": metadata.get("RetryAttempts", 0),
+                            "throttledAttempts": call_stats[1],
+                            "requestBodySize": call_stats[0],
+                            "responseBodySize": int(response_size)
+                            if response_size
+                            else None,
+                        },
+                    )
 
-        try:
-            wrapt.wrap_function_wrapper(
-                "botocore.client", "BaseClient._make_api_call", wrapper
-            )
-        except ImportError:
-            pass
+        self.wrap_on_import("botocore.client", "BaseClient._make_api_call", wrapper)
 
     def instrument_urllib3(self):
+        should_capture = host_filter.should_capture
+
         def wrapper(wrapped, instance, args, kwargs):
+            if not should_capture(instance.host):
+                return wrapped(*args, **kwargs)
+            if not capture_aws_sdk_http:
+                headers = kwargs.get("headers")
+                user_agent = headers.get("User-Agent") if headers else None
+                # Ignore http calls from boto
+                # sometimes ua is binary string sometimes a normal string :/
+                if user_agent and user_agent.startswith(
+                    b"Boto3" if isinstance(user_agent, bytes) else "Boto3"
+                ):
+                    return wrapped(*args, **kwargs)
             if "method" in kwargs:
                 method = kwargs["method"]
             else:
@@ -515,133 +862,149 @@ class SDK(object):
                 path = kwargs["url"]
             else:
                 path = args[1]
-            user_agent = kwargs.get("headers", {}).get("User-Agent", "")
-            # sometimes ua is binary string sometimes a normal string :/
-            if hasattr(user_agent, "decode"):
-                user_agent = user_agent.decode()
-            status = None
-            if (
-                not self.disable_http_spans
-                and (
-                    # Ignore http calls from boto
-                    not user_agent.startswith("Boto3")
-                    or os.environ.get(
-                        "SERVERLESS_ENTERPRISE_SPANS_CAPTURE_AWS_SDK_HTTP"
-                    )
-                )
-                and (
-                    capture_hosts.get("*", False)
-                    or capture_hosts.get(instance.host.lower(), False)
+            if capture_http_network:
+                # the pool may be retrying or redirecting from its own urlopen
+                outer_timings = getattr(current_request, "timings", None)
+                timings = current_request.timings = RequestTimings()
+            with self.span("http") as span:
+                span.set_tag("requestHostname", instance.host)
+                span.set_tag("requestPath", path)
+                span.set_tag("httpMethod", method)
+                try:
+                    response = wrapped(*args, **kwargs)
+                    return response
+                except Exception as e:
+                    response = None
+                    span.set_tag("httpStatus", "Exc")
+                    raise e
+                finally:
+                    if response:
+                        span.set_tag("httpStatus", response.status)
+                    if capture_http_network:
+                        current_request.timings = outer_timings
+                        tag_network(span, instance, args, kwargs, response, timings)
+
+        def tag_network(span, pool, args, kwargs, response, timings):
+            reused = not timings.connected
+            self.connection_reuse.record(pool.host, reused)
+            span.set_tag("connectionReused", reused)
+            if timings.connected:
+                span.set_tag("tcpConnectDuration", timings.tcp_ns / 1000000.0)
+                span.set_tag(
+                    "tlsHandshakeDuration",
+                    (timings.connect_ns - timings.tcp_ns) / 1000000.0
+                    if pool.scheme == "https"
+                    else None,
                 )
-                and not ignore_hosts.get(instance.host.lower(), False)
-            ):
-                with self.span("http") as span:
-                    span.set_tag("requestHostname", instance.host)
-                    span.set_tag("requestPath", path)
-                    span.set_tag("httpMethod", method)
-                    try:
-                        response = wrapped(*args, **kwargs)
-                        return response
-                    except Exception as e:
-                        response = None
-                        span.set_tag("httpStatus", "Exc")
-                        raise e
-                    finally:
-                        if response:
-                            span.set_tag("httpStatus", response.status)
-            else:
-                return wrapped(*args, **kwargs)
-
-        try:
-            wrapt.wrap_function_wrapper(
-                "urllib3.connectionpool", "HTTPConnectionPool.urlopen", wrapper
+            span.set_tag("timeToFirstByte", timings.ttfb_ns / 1000000.0)
+            body = kwargs["body"] if "body" in kwargs else (args[2] if len(args) > 2 else None)
+            span.set_tag(
+                "requestBodySize",
+                len(body) if isinstance(body, (bytes, str)) else (0 if body is None else None),
             )
-        except ImportError:
-            pass
-        try:
-            wrapt.wrap_function_wrapper(
-                "botocore.vendored.requests.packages.urllib3.connectionpool",
-                "HTTPConnectionPool.urlopen",
-                wrapper,
+            if response is not None:
+                if kwargs.get("preload_content", True):
+                    span.set_tag("responseBodySize", response.tell())
+                else:
+                    size = response.headers.get("content-length")
+                    span.set_tag("responseBodySize", int(size) if size else None)
+
+        for package in ("urllib3", "botocore.vendored.requests.packages.urllib3"):
+            self.wrap_on_import(
+                package + ".connectionpool", "HTTPConnectionPool.urlopen", wrapper
             )
-        except ImportError:
-            pass
+            if capture_http_network:
+                connection = package + ".connection"
+                self.wrap_on_import(connection, "HTTPConnection.connect", timed_connect)
+                self.wrap_on_import(connection, "HTTPSConnection.connect", timed_connect)
+                self.wrap_on_import(connection, "HTTPConnection._new_conn", timed_new_conn)
+                self.wrap_on_import(
+                    connection, "HTTPConnection.getresponse", timed_getresponse
+                )
 
     def instrument_stdlib_urllib(self, module):
+        should_capture = host_filter.should_capture
+
         def wrapper(wrapped, instance, args, kwargs):
             http_class, req = args
-            status = None
-            if (
-                capture_hosts.get("*", False)
-                or capture_hosts.get(req.host.lower(), False)
-            ) and not ignore_hosts.get(req.host.lower(), False):
-                with self.span("http") as span:
-                    try:
-                        response = wrapped(*args, **kwargs)
-                        return response
-                    except Exception as error:
-                        if getattr(error, "code", None) is not None:
-                            response = error
-                        else:
-                            response = None
-                            span.set_tag("httpStatus", "Exc")
-                        raise error
-                    finally:
-                        if response:
-                            status = response.code
-                            span.set_tag("requestHostname", req.host.lower())
-                            span.set_tag(
-                                "requestPath", urlparse(
-                                    req.get_full_url()).path
-                            )
-                            span.set_tag("httpMethod", req.get_method())
-                            span.set_tag("httpStatus", status)
-            else:
+            if not should_capture(req.host):
                 return wrapped(*args, **kwargs)
-
-        try:
-            wrapt.wrap_function_wrapper(
-                module, "AbstractHTTPHandler.do_open", wrapper)
-        except ImportError:
-            pass
-
-    def instrument_flask(self, module):
-        def wrap_init(wrapped, app, args, kwargs):
-            wrapped(*args, **kwargs)
-            app_dispatch_request = app.dispatch_request
-            def dispatch_request(self):
+            with self.span("http") as span:
                 try:
-                    from flask import _request_ctx_stack
-                    req = _request_ctx_stack.top.request
-                    set_endpoint(endpoint=req.url_rule.rule, meta={"mechanism": "flask-middleware"})
-                except:
-                    pass
-                return app_dispatch_request()
-            from types import MethodType
-            app.dispatch_request = MethodType(dispatch_request, app)
-
-            try:
-                def after(response):
-                    try:
-                        from flask import request
-                        try:
-                            status = response.status_code.value # http.HTTPStatus?
-                        except:
-                            status = response.status_code or response.default_status
-                        set_endpoint(
-                            endpoint=None,
-                            http_method=request.method,
-                            http_status_code=status,
-                            meta={"mechanism": "flask-middleware"}
-                        )
-                    except:
-                        pass
+                    response = wrapped(*args, **kwargs)
                     return response
-                app.after_request(after)
-            except:
-                pass
+                except Exception as error:
+                    if getattr(error, "code", None) is not None:
+                        response = error
+                    else:
+                        response = None
+                        span.set_tag("httpStatus", "Exc")
+                    raise error
+                finally:
+                    if response:
+                        span.set_tag("requestHostname", req.host.lower())
+                        span.set_tag(
+                            "requestPath", urlparse(req.get_full_url()).path
+                        )
+                        span.set_tag("httpMethod", req.get_method())
+                        span.set_tag("httpStatus", response.code)
 
-        try:
-            wrapt.wrap_function_wrapper(module, "Flask.__init__", wrap_init)
-        except ImportError:
-            pass
+        self.wrap_on_import(module, "AbstractHTTPHandler.do_open", wrapper)
+
+    def instrument_threads(self):
+        """
+        Runs work submitted to thread pools in the context of the invocation
+        submitting it, so the spans it opens belong to that invocation
+        (python 3.7+, without contextvars they go to the invocation running
+        when they are opened).
+
+        Plain threads are left alone: often started once and kept for the
+        life of the container, bound to the invocation starting them they
+        would lose their spans once it ends.
+        """
+
+        def submit_wrapper(wrapped, instance, args, kwargs):
+            if not args:
+                return wrapped(*args, **kwargs)
+            return wrapped(bind_current_context(args[0]), *args[1:], **kwargs)
+
+        self.wrap_on_import(
+            "concurrent.futures.thread", "ThreadPoolExecutor.submit", submit_wrapper
+        )
+
+    def instrument_frameworks(self):
+        """
+        Route instrumentation at the WSGI/ASGI entry point of Flask, Django
+        and Starlette (incl. FastAPI) applications, see `frameworks`
+        """
+        self.wrap_on_import(
+            "flask",
+            "Flask.wsgi_app",
+            wsgi_wrapper(self, recorded_route, "flask-middleware"),
+        )
+        self.wrap_on_import("flask", "Flask.dispatch_request", flask_dispatch_wrapper)
+        self.wrap_on_import(
+            "django.core.handlers.wsgi",
+            "WSGIHandler.__call__",
+            wsgi_wrapper(self, recorded_route, "django-middleware"),
+        )
+        self.wrap_on_import(
+            "django.core.handlers.base",
+            "BaseHandler.resolve_request",
+            django_resolve_wrapper,
+        )
+        if asgi_wrapper is None:
+            return
+        self.wrap_on_import(
+            "django.core.handlers.asgi",
+            "ASGIHandler.__call__",
+            asgi_wrapper(self, recorded_route, "django-middleware"),
+        )
+        self.wrap_on_import(
+            "starlette.applications",
+            "Starlette.__call__",
+            asgi_wrapper(self, starlette_route, "starlette-middleware"),
+        )
+
+if cold_start_profiler:
+    cold_start_profiler.add_phase("sdkImport", sdk_import_started, now_ns())
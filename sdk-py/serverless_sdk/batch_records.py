@@ -0,0 +1,132 @@
+from serverless_sdk.histogram import LogHistogram
+from serverless_sdk.spans import now_ns
+
+# failed record ids reported with the transaction, all are kept for `response()`
+MAX_REPORTED_FAILURES = 50
+
+# record event source: path of the id used in partial batch responses
+RECORD_ID_PATHS = {
+    "aws:sqs": ("messageId",),
+    "aws:kinesis": ("kinesis", "sequenceNumber"),
+    "aws:dynamodb": ("dynamodb", "SequenceNumber"),
+}
+
+
+def record_id(record):
+    if not isinstance(record, dict):
+        return None
+    path = RECORD_ID_PATHS.get(record.get("eventSource"))
+    if path is None:
+        return None
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+class BatchRecords(object):
+    """
+    Iterates the records of an SQS, Kinesis or DynamoDB batch, timing the
+    processing of each (from the record being handed out until the next one
+    is asked for) into a latency histogram rather than a span per record, so
+    memory does not grow with the batch size.
+
+        batch = context.serverless_sdk.batch(event)
+        for record in batch:
+            try:
+                process(record)
+            except Exception:
+                batch.fail(record)
+        return batch.response()
+
+    A record still being processed when the invocation fails (e.g. its
+    exception escaped the loop, or the function timed out) is marked failed.
+
+    Only these event sources support partial batch responses, records of
+    any other raise a `ValueError`.
+    """
+
+    __slots__ = (
+        "records",
+        "histogram",
+        "failed_ids",
+        "slowest_id",
+        "slowest_duration",
+        "current",
+        "started",
+    )
+
+    def __init__(self, records):
+        if isinstance(records, dict):
+            records = records.get("Records") or []
+        # a batch comes from a single event source mapping
+        record = records[0] if records else {}
+        source = record.get("eventSource") if isinstance(record, dict) else None
+        if records and source not in RECORD_ID_PATHS:
+            raise ValueError(
+                "partial batch responses are not supported for records "
+                "of event source {!r}".format(source)
+            )
+        self.records = records
+        self.histogram = LogHistogram()
+        self.failed_ids = []
+        self.slowest_id = None
+        self.slowest_duration = 0
+        self.current = None
+        self.started = None
+
+    def __iter__(self):
+        for record in self.records:
+            self.current = record
+            self.started = now_ns()
+            yield record
+            if self.current is not None:  # else closed meanwhile, on timeout
+                self._done()
+
+    def _done(self):
+        duration = (now_ns() - self.started) / 1000000.0
+        self.histogram.record(duration)
+        if duration > self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_id = record_id(self.current)
+        self.current = None
+
+    def fail(self, record=None):
+        """Marks `record` (by default the one being processed) as failed"""
+        identifier = record_id(self.current if record is None else record)
+        if not self.failed_ids or self.failed_ids[-1] != identifier:
+            self.failed_ids.append(identifier)
+
+    def response(self):
+        """Partial batch response, for Lambda to retry the failed records only"""
+        return {
+            "batchItemFailures": [
+                {"itemIdentifier": identifier} for identifier in self.failed_ids
+            ]
+        }
+
+    def close(self, failed):
+        """
+        Stops timing, marking the record being processed failed if `failed`,
+        and returns the report sent with the transaction
+        """
+        if self.current is not None:
+            if failed:
+                self.fail()
+            self._done()
+        histogram = self.histogram
+        if not histogram.count:
+            return {"count": 0, "failedCount": len(self.failed_ids)}
+        return {
+            "count": histogram.count,
+            "totalDuration": round(histogram.total, 3),
+            "minDuration": round(histogram.min, 3),
+            "maxDuration": round(histogram.max, 3),
+            "p50Duration": round(histogram.quantile(0.5), 3),
+            "p95Duration": round(histogram.quantile(0.95), 3),
+            "p99Duration": round(histogram.quantile(0.99), 3),
+            "slowestRecordId": self.slowest_id,
+            "failedCount": len(self.failed_ids),
+            "failedRecordIds": self.failed_ids[:MAX_REPORTED_FAILURES],
+        }
@@ -0,0 +1,136 @@
+import os
+import sys
+from contextlib import contextmanager
+
+from serverless_sdk.spans import Span, get_clock_anchor, now_ns
+
+# the import tree can hold hundreds of modules, only the slowest are reported
+MAX_RECORDED_IMPORTS = 1000
+MAX_REPORTED_IMPORTS = 20
+
+
+class ColdStartProfiler(object):
+    """
+    Records cold start phases (SDK import and init, instrumentation, user
+    module import) and, optionally, the import time of every module imported
+    until the first transaction ends. Reported as "coldstart" spans on the
+    first transaction.
+
+    Enabled with `SERVERLESS_ENTERPRISE_COLDSTART_PROFILE` set to `phases`
+    (or any other non-empty value), or `imports` to also trace module imports.
+    """
+
+    def __init__(self, trace_imports=False):
+        self.phases = []
+        self.imports = []
+        self._finder = None
+        if trace_imports and sys.version_info[0] > 2:
+            self._finder = _ImportTimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    @classmethod
+    def from_env(cls):
+        mode = os.environ.get("SERVERLESS_ENTERPRISE_COLDSTART_PROFILE")
+        if not mode:
+            return None
+        return cls(trace_imports=mode == "imports")
+
+    def add_phase(self, name, start_ns, end_ns):
+        self.phases.append((name, start_ns, end_ns))
+
+    @contextmanager
+    def phase(self, name):
+        start_ns = now_ns()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start_ns, now_ns())
+
+    def stop(self):
+        if self._finder is not None:
+            try:
+                sys.meta_path.remove(self._finder)
+            except ValueError:
+                pass
+            self._finder = None
+
+    def spans(self):
+        """Stops import tracing and returns the recorded timings as spans"""
+        self.stop()
+        anchor = get_clock_anchor()
+        spans = [
+            _make_span(anchor, start_ns, end_ns, {"phase": name})
+            for name, start_ns, end_ns in self.phases
+        ]
+        slowest_imports = sorted(
+            self.imports, key=lambda record: record[3] - record[2], reverse=True
+        )[:MAX_REPORTED_IMPORTS]
+        for name, depth, start_ns, end_ns in slowest_imports:
+            spans.append(
+                _make_span(
+                    anchor,
+                    start_ns,
+                    end_ns,
+                    {"phase": "import", "module": name, "importDepth": depth},
+                )
+            )
+        return spans
+
+
+def _make_span(anchor, start_ns, end_ns, tags):
+    span = Span(None, "coldstart")
+    span.anchor = anchor
+    span.start_ns = start_ns
+    span.end_ns = end_ns
+    span.tags = tags
+    return span
+
+
+class _ImportTimingFinder(object):
+    """
+    Meta path finder timing module execution. It resolves specs through the
+    finders that follow it and times `exec_module` of the module's loader.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.depth = 0
+
+    def find_spec(self, fullname, path=None, target=None):
+        try:
+            finders = sys.meta_path[sys.meta_path.index(self) + 1 :]
+        except ValueError:
+            return None
+        for finder in finders:
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                # legacy finder, let the import system handle it as usual
+                return None
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # only per-module loader instances (source, bytecode and extension
+        # modules), patching shared ones (e.g. zipimporter) would mix modules up
+        if (
+            getattr(loader, "name", None) == fullname
+            and hasattr(loader, "exec_module")
+            and len(self.profiler.imports) < MAX_RECORDED_IMPORTS
+        ):
+            loader.exec_module = self._timed(fullname, loader.exec_module)
+        return spec
+
+    def _timed(self, fullname, exec_module):
+        def timed_exec_module(module):
+            depth = self.depth
+            self.depth += 1
+            start_ns = now_ns()
+            try:
+                exec_module(module)
+            finally:
+                self.depth = depth
+                self.profiler.imports.append((fullname, depth, start_ns, now_ns()))
+
+        return timed_exec_module
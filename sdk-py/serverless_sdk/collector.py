@@ -0,0 +1,82 @@
+from functools import partial
+
+from serverless_sdk.span_store import SpanStore
+
+try:
+    from threading import get_ident  # python 3
+except ImportError:
+    from thread import get_ident  # python 2
+
+try:
+    import contextvars  # python 3.7+
+
+    _current_collector = contextvars.ContextVar(
+        "serverless_sdk_span_collector", default=None
+    )
+except ImportError:
+    _current_collector = None
+
+
+def get_current_collector():
+    """
+    Collector of the invocation the running code belongs to, as recorded in
+    the current context (propagated to asyncio tasks, not to plain threads)
+    """
+    if _current_collector is None:
+        return None
+    return _current_collector.get()
+
+
+def set_current_collector(collector):
+    if _current_collector is None:
+        return None
+    return _current_collector.set(collector)
+
+
+def reset_current_collector(token):
+    if token is not None:
+        _current_collector.reset(token)
+
+
+def bind_current_context(func):
+    """
+    `func` running in a copy of the current context wherever it is called,
+    so spans opened from other threads go to the collector of the invocation
+    that handed them the work (and are dropped once it is closed)
+    """
+    if _current_collector is None:
+        return func
+    return partial(contextvars.copy_context().run, func)
+
+
+class SpanCollector(object):
+    """
+    Collects the spans of one invocation into per-thread span stores, so
+    threads fanning out calls append without locking, merged on `close()`.
+    Spans recorded once the collector is closed (e.g. by pool work outliving
+    the invocation, which is handed its context by `SDK.instrument_threads`)
+    are dropped instead of leaking into the next invocation.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._stores = {}
+
+    def append(self, span):
+        if self.closed:
+            return
+        ident = get_ident()
+        store = self._stores.get(ident)
+        if store is None:
+            store = self._stores.setdefault(ident, SpanStore())
+        store.append(span)
+
+    def close(self):
+        """Stops collecting and returns the merged span store"""
+        self.closed = True
+        stores = list(self._stores.values())
+        if not stores:
+            return SpanStore()
+        if len(stores) == 1:
+            return stores[0]
+        return SpanStore.merge(stores)
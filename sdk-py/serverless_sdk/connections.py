@@ -0,0 +1,106 @@
+import threading
+
+from serverless_sdk.spans import now_ns
+
+# hosts of a transaction's connection reuse summary, others are counted as "*"
+MAX_HOSTS = 50
+
+# timings of the HTTP request in progress on the thread, see RequestTimings
+current_request = threading.local()
+
+
+class RequestTimings(object):
+    """
+    Network phases of an HTTP request, in nanoseconds: opening the TCP
+    connection, connecting (TCP and TLS handshake) and waiting for the
+    response headers. No connection is opened when one is reused.
+    """
+
+    __slots__ = ("tcp_ns", "connect_ns", "ttfb_ns", "connected", "connecting")
+
+    def __init__(self):
+        self.tcp_ns = 0
+        self.connect_ns = 0
+        self.ttfb_ns = 0
+        self.connected = False
+        self.connecting = False
+
+
+def timed_connect(wrapped, instance, args, kwargs):
+    timings = getattr(current_request, "timings", None)
+    # HTTPS connections may call up to the HTTP connect
+    if timings is None or timings.connecting:
+        return wrapped(*args, **kwargs)
+    timings.connecting = True
+    started = now_ns()
+    try:
+        return wrapped(*args, **kwargs)
+    finally:
+        timings.connect_ns += now_ns() - started
+        timings.connecting = False
+        timings.connected = True
+
+
+def timed_new_conn(wrapped, instance, args, kwargs):
+    timings = getattr(current_request, "timings", None)
+    if timings is None:
+        return wrapped(*args, **kwargs)
+    started = now_ns()
+    try:
+        return wrapped(*args, **kwargs)
+    finally:
+        timings.tcp_ns += now_ns() - started
+
+
+def timed_getresponse(wrapped, instance, args, kwargs):
+    timings = getattr(current_request, "timings", None)
+    if timings is None:
+        return wrapped(*args, **kwargs)
+    started = now_ns()
+    try:
+        return wrapped(*args, **kwargs)
+    finally:
+        timings.ttfb_ns += now_ns() - started
+
+
+class ConnectionReuse(object):
+    """
+    Counts of HTTP requests made over new and reused connections per host,
+    shared by the threads of an invocation and popped when it ends
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def record(self, host, reused):
+        with self._lock:
+            counts = self._hosts.get(host)
+            if counts is None:
+                if len(self._hosts) >= MAX_HOSTS:
+                    host = "*"
+                counts = self._hosts.setdefault(host, [0, 0])
+            counts[0] += 1
+            if reused:
+                counts[1] += 1
+
+    def pop(self, blocking=True):
+        """
+        Summary of the requests recorded so far, which are then forgotten.
+        Unless `blocking`, empty if a request is being recorded at the time
+        (see `Metrics.collect`).
+        """
+        if not self._lock.acquire(blocking):
+            return {}
+        try:
+            hosts, self._hosts = self._hosts, {}
+        finally:
+            self._lock.release()
+        return {
+            host: {
+                "requests": requests,
+                "reused": reused,
+                "reuseRatio": round(reused / float(requests), 3),
+            }
+            for host, (requests, reused) in hosts.items()
+        }
@@ -0,0 +1,197 @@
+import base64
+import json
+import sys
+import threading
+import zlib
+from io import BytesIO
+
+from serverless_sdk.util import number_from_env
+
+LOG_PREFIX = "SERVERLESS_ENTERPRISE "
+
+# CloudWatch Logs rejects events larger than 256 KB, keep some room for the
+# prefix and the `{c, b, origin}` envelope
+DEFAULT_MAX_PAYLOAD_SIZE = 256 * 1024 - 1024
+DEFAULT_COMPRESSION_LEVEL = 6
+COMPRESS_BLOCK_SIZE = 16 * 1024
+
+# wbits value instructing zlib to produce a gzip container (as `gzip` does)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+# gzip header and trailer, final block and stored block headers
+GZIP_OVERHEAD = 64
+
+SPANS_TAIL = '],"droppedSpans":{}}}}}'
+
+
+class TransactionEmitter(object):
+    """
+    Writes transactions to the log as `SERVERLESS_ENTERPRISE {"c", "b", "origin"}`
+    lines, using the same envelope as `buildOutput()` in the JS SDK.
+
+    The transaction is serialized piece by piece straight into a compressor
+    (instead of `json.dumps` + `gzip` + `base64` over the whole document), the
+    compressed bytes land in a buffer that is reused across invocations, and
+    spans that would push the written payload (base64 encoded gzip when
+    compressing) over `max_payload_size` are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        compress=True,
+        compression_level=None,
+        max_payload_size=None,
+        stream=None,
+    ):
+        self.compress = compress
+        self.compression_level = (
+            compression_level
+            if compression_level is not None
+            else number_from_env(
+                "SERVERLESS_ENTERPRISE_COMPRESSION_LEVEL",
+                DEFAULT_COMPRESSION_LEVEL,
+                int,
+            )
+        )
+        self.max_payload_size = (
+            max_payload_size
+            if max_payload_size is not None
+            else number_from_env(
+                "SERVERLESS_ENTERPRISE_MAX_PAYLOAD_SIZE", DEFAULT_MAX_PAYLOAD_SIZE, int
+            )
+        )
+        # resolved on emit, as the runtime may swap `sys.stdout` after import
+        self.stream = stream
+        self.dropped_spans = 0
+        # values that are not JSON serializable (e.g. user span tags) are
+        # reported as strings rather than failing the transaction
+        self._encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+        self._buffer = BytesIO()
+        self._lock = threading.Lock()
+
+    def emit(self, transaction_data):
+        # never wait for the shared buffer: on timeout this runs in the SIGTERM
+        # handler, possibly on top of a frame encoding into it
+        if self._lock.acquire(False):
+            try:
+                line = self.encode(transaction_data)
+            finally:
+                self._lock.release()
+        else:
+            line = self.encode(transaction_data, BytesIO())
+        stream = self.stream or sys.stdout
+        stream.write(line + "\n")
+        stream.flush()
+
+    def encode(self, transaction_data, buffer=None):
+        origin = self._encode(transaction_data.get("origin"))
+        max_size = self.max_payload_size
+        if not self.compress:
+            chunks = []
+            size = [0]
+
+            def write(chunk):
+                chunks.append(chunk)
+                size[0] += len(chunk)
+
+            self._write_transaction(
+                transaction_data, write, lambda extra: size[0] + extra <= max_size
+            )
+            return '{}{{"c":false,"b":{},"origin":{}}}'.format(
+                LOG_PREFIX, "".join(chunks), origin
+            )
+
+        if buffer is None:
+            buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        compressor = zlib.compressobj(
+            self.compression_level, zlib.DEFLATED, GZIP_WBITS
+        )
+        # the cap applies to the base64 encoded gzip stream
+        max_compressed = max_size // 4 * 3 - GZIP_OVERHEAD
+
+        # hand the compressor reasonably sized blocks rather than every span
+        pending = []
+        # uncompressed bytes not written yet, and held by the compressor
+        pending_size = [0]
+        buffered_size = [0]
+
+        def compress_pending():
+            buffer.write(compressor.compress("".join(pending).encode("ascii")))
+            buffered_size[0] += pending_size[0]
+            del pending[:]
+            pending_size[0] = 0
+
+        def write(chunk):
+            pending.append(chunk)
+            pending_size[0] += len(chunk)
+            if pending_size[0] >= COMPRESS_BLOCK_SIZE:
+                compress_pending()
+
+        def fits(extra):
+            # data never compresses much larger than itself, so the size
+            # written plus what is not compressed yet is an upper bound
+            size = buffer.tell() + buffered_size[0] + pending_size[0] + extra
+            if size <= max_compressed:
+                return True
+            # get the exact size before dropping anything
+            compress_pending()
+            buffer.write(compressor.flush(zlib.Z_SYNC_FLUSH))
+            buffered_size[0] = 0
+            return buffer.tell() + extra <= max_compressed
+
+        self._write_transaction(transaction_data, write, fits)
+        compress_pending()
+        buffer.write(compressor.flush())
+        if hasattr(buffer, "getbuffer"):
+            # avoid copying the compressed bytes just to base64 them
+            with buffer.getbuffer() as view:
+                body = base64.b64encode(view)
+        else:
+            body = base64.b64encode(buffer.getvalue())
+        return '{}{{"c":true,"b":"{}","origin":{}}}'.format(
+            LOG_PREFIX, body.decode("ascii"), origin
+        )
+
+    def _write_transaction(self, transaction_data, write, fits):
+        """
+        Serializes `transaction_data` through `write`, spans last so the ones
+        that would push the payload over the cap (`fits(size)` is False) are
+        dropped, and counted in `payload.droppedSpans`.
+        Output is ASCII only (`ensure_ascii`), so string length equals byte size.
+        """
+        encode = self._encode
+        payload = transaction_data.get("payload") or {}
+        head = ["{"]
+        for key, value in transaction_data.items():
+            if key != "payload":
+                head.extend((encode(key), ":", encode(value), ","))
+        head.append('"payload":{')
+        for key, value in payload.items():
+            if key != "spans":
+                head.extend((encode(key), ":", encode(value), ","))
+        head.append('"spans":[')
+        write("".join(head))
+
+        spans = payload.get("spans") or ()
+        # room for the largest possible count
+        tail_size = len(SPANS_TAIL.format(len(spans)))
+        # usually all spans fit, encode them in one go
+        encoded = encode(spans)
+        if fits(len(encoded) + tail_size):
+            write(encoded[1:-1])
+            self.dropped_spans = 0
+            write(SPANS_TAIL.format(0))
+            return
+
+        written = 0
+        for span in spans:
+            chunk = encode(span)
+            if written:
+                chunk = "," + chunk
+            if not fits(len(chunk) + tail_size):
+                break
+            write(chunk)
+            written += 1
+        self.dropped_spans = len(spans) - written
+        write(SPANS_TAIL.format(self.dropped_spans))
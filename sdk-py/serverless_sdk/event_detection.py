@@ -0,0 +1,178 @@
+"""
+Detection of the AWS service which triggered an invocation from the shape of
+its event, as done by sdk-js/src/lib/event-detection.
+
+Rather than trying every detector in turn, each event type is registered
+under a top-level key it cannot do without. A single pass over the event's
+keys picks the candidate detectors, which are then tried in the same order
+as in the JS SDK (checked by benchmarks/event_detection_parity.py).
+"""
+from functools import partial
+from operator import itemgetter
+
+
+def _is_set(value):
+    """JavaScript truthiness, which the JS detectors rely on (`{}` is set)"""
+    return value is not None and value is not False and value != "" and value != 0
+
+
+def _get(obj, *path):
+    for key in path:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def _first_record(event, key="Records"):
+    records = event.get(key)
+    if isinstance(records, list) and records and isinstance(records[0], dict):
+        return records[0]
+    return None
+
+
+def detect_alexa_skill(event):
+    if (
+        _is_set(_get(event, "session", "attributes"))
+        and _is_set(_get(event, "session", "user"))
+        and _is_set(_get(event, "context", "System"))
+        and _is_set(_get(event, "request", "requestId"))
+    ):
+        return "aws.alexaskill", None
+
+
+def detect_custom_authorizer(event):
+    if _is_set(event.get("methodArn")) and event.get("type") in ("TOKEN", "REQUEST"):
+        return "aws.apigateway.authorizer", event["methodArn"]
+
+
+def detect_api_gateway(event):
+    if all(
+        key in event
+        for key in ("path", "headers", "requestContext", "resource", "httpMethod")
+    ):
+        return "aws.apigateway.http", None
+
+
+def detect_api_gateway_v2(event):
+    if event.get("version") == "2.0" and all(
+        key in event
+        for key in ("rawPath", "headers", "requestContext", "routeKey", "version")
+    ):
+        return "aws.apigatewayv2.http", None
+
+
+def detect_cloudfront(event):
+    record = _first_record(event)
+    if record is not None and _is_set(record.get("cf")):
+        return "aws.cloudfront", None
+
+
+# record event source: (event type, path of the source ARN in the record)
+STREAM_SOURCES = {
+    "aws:kinesis": ("aws.kinesis", ("eventSourceARN",)),
+    "aws:s3": ("aws.s3", ("s3", "bucket", "arn")),
+}
+QUEUE_SOURCES = {
+    "aws:sqs": ("aws.sqs", ("eventSourceARN",)),
+    "aws:dynamodb": ("aws.dynamodb", ("eventSourceARN",)),
+}
+
+# (key of the event source in the record, sources) in the order of the JS SDK,
+# which tries the scheduled detector between s3 and ses; SNS records spell
+# the key `EventSource`
+STREAM_RECORDS = (("eventSource", STREAM_SOURCES),)
+LATE_RECORDS = (
+    ("eventSource", {"aws:ses": ("aws.ses", None)}),
+    ("EventSource", {"aws:sns": ("aws.sns", ("Sns", "TopicArn"))}),
+    ("eventSource", QUEUE_SOURCES),
+)
+
+
+def detect_record_source(lookups, event):
+    record = _first_record(event)
+    if record is None:
+        return None
+    for key, sources in lookups:
+        try:
+            source = sources.get(record.get(key))
+        except TypeError:  # not a string, nor hashable
+            continue
+        if source is not None:
+            event_type, arn_path = source
+            return event_type, _get(record, *arn_path) if arn_path else None
+    return None
+
+
+def detect_cloudwatch_log(event):
+    if _is_set(_get(event, "awslogs", "data")):
+        return "aws.cloudwatch.log", None
+
+
+def detect_firehose(event):
+    record = _first_record(event, "records")
+    if (
+        _is_set(event.get("deliveryStreamArn"))
+        and record is not None
+        and _is_set(record.get("kinesisRecordMetadata"))
+    ):
+        return "aws.firehose", event["deliveryStreamArn"]
+
+
+def _resource_arn(event):
+    resources = event.get("resources")
+    return resources[0] if isinstance(resources, list) and resources else None
+
+
+def detect_scheduled(event):
+    if event.get("source") == "aws.events":
+        return "aws.scheduled", _resource_arn(event)
+
+
+def detect_cloudwatch_event(event):
+    # lacks distinguishing characteristics, tried last
+    if _is_set(event.get("source")) and _is_set(event.get("detail")):
+        return "aws.cloudwatch.event", _resource_arn(event)
+
+
+# top-level key: (order of the JS SDK, detector) of the detectors needing it
+DISCRIMINATORS = {
+    "session": ((0, detect_alexa_skill),),
+    "methodArn": ((1, detect_custom_authorizer),),
+    "httpMethod": ((2, detect_api_gateway),),
+    "routeKey": ((3, detect_api_gateway_v2),),
+    "Records": (
+        (4, detect_cloudfront),
+        (7, partial(detect_record_source, STREAM_RECORDS)),
+        (10, partial(detect_record_source, LATE_RECORDS)),
+    ),
+    "awslogs": ((5, detect_cloudwatch_log),),
+    "deliveryStreamArn": ((6, detect_firehose),),
+    "source": ((9, detect_scheduled), (14, detect_cloudwatch_event)),
+}
+
+
+def detect_event_type(event):
+    """
+    (event type, ARN of the triggering resource if the event carries it) of
+    `event`, `(None, None)` when the trigger is not recognized
+    """
+    if not isinstance(event, dict):
+        return None, None
+    candidates = None
+    for key in event:
+        if key in DISCRIMINATORS:
+            if candidates is None:
+                # usually the only one, already in order
+                candidates = DISCRIMINATORS[key]
+            else:
+                candidates = sorted(
+                    candidates + DISCRIMINATORS[key], key=itemgetter(0)
+                )
+    if candidates is None:
+        return None, None
+    for _, detect in candidates:
+        detected = detect(event)
+        if detected:
+            return detected
+    return None, None
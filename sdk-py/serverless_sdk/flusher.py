@@ -0,0 +1,67 @@
+import sys
+import threading
+import traceback
+
+try:
+    import queue  # python 3
+except ImportError:
+    import Queue as queue  # python 2
+
+
+class BackgroundFlusher(object):
+    """
+    Runs jobs (transaction serialization and emission) on a single worker
+    thread, started on first use and kept for the life of the container.
+
+    Lambda freezes the sandbox as soon as the handler returns, so queued jobs
+    may not get to run until the container is thawed. `flush()` drains the
+    queue on the calling thread and must be called wherever a pending job
+    could otherwise be lost (start of the next invocation, SIGTERM).
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, job):
+        if self._thread is None:
+            self._start()
+        self._queue.put(job)
+
+    def flush(self):
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._run(job)
+        # wait for the job the worker may be in the middle of
+        self._queue.join()
+
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            thread = threading.Thread(
+                target=self._work, name="serverless-sdk-flusher"
+            )
+            thread.daemon = True
+            thread.start()
+            self._thread = thread
+
+    def _work(self):
+        while True:
+            self._run(self._queue.get())
+
+    def _run(self, job):
+        try:
+            job()
+        except Exception:
+            sys.stderr.write(
+                "serverless_sdk: failed to flush transaction\n{}".format(
+                    traceback.format_exc()
+                )
+            )
+        finally:
+            self._queue.task_done()
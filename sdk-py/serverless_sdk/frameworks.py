@@ -0,0 +1,140 @@
+"""
+Route instrumentation of web frameworks at their WSGI/ASGI entry point:
+sets the endpoint (route template), HTTP method and status code of the
+transaction and times each request in a span labelled with its route.
+
+Route templates are the ones the framework matched while dispatching the
+request, never resolved again: Flask and Django record them in the
+environ/scope of the request (`record_route`, from the hooks below), and
+Starlette's router leaves the matched route in its scope.
+"""
+
+# set in the environ/scope of requests already instrumented, e.g. by a parent
+# application mounting the one being called, to the route once matched
+ROUTE_KEY = "serverless_sdk.route"
+
+
+def record_route(carrier, route):
+    """Records the `route` matched for the request of `carrier` (environ/scope)"""
+    if ROUTE_KEY in carrier:
+        carrier[ROUTE_KEY] = route
+
+
+def recorded_route(app, carrier):
+    return carrier.get(ROUTE_KEY)
+
+
+def flask_dispatch_wrapper(wrapped, app, args, kwargs):
+    """Wraps `Flask.dispatch_request`, with the request's rule already matched"""
+    from flask import request
+
+    rule = request.url_rule
+    record_route(request.environ, rule.rule if rule is not None else None)
+    return wrapped(*args, **kwargs)
+
+
+def django_resolve_wrapper(wrapped, handler, args, kwargs):
+    """Wraps `BaseHandler.resolve_request` (Django 3.1+)"""
+    resolver_match = wrapped(*args, **kwargs)
+    request = args[0] if args else kwargs["request"]
+    route = resolver_match.route
+    # the scope of ASGI requests, `META` is a copy of it
+    carrier = getattr(request, "scope", None) or request.environ
+    record_route(carrier, "/" + route if route else None)
+    return resolver_match
+
+
+def starlette_route_templates(routes, prefix=""):
+    """
+    Full path templates of `routes` and of the ones mounted under them, by
+    `id()` of the route and of its endpoint (routes aren't hashable)
+    """
+    templates = {}
+    for route in routes:
+        template = prefix + getattr(route, "path", "")
+        mounted = getattr(route, "routes", None)
+        if mounted:
+            templates.update(starlette_route_templates(mounted, template))
+            # left as the matched route when none of its own matches
+            templates.setdefault(id(route), None)
+            continue
+        templates.setdefault(id(route), template)
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is not None:
+            templates.setdefault(id(endpoint), template)
+    return templates
+
+
+def starlette_route(app, scope):
+    """
+    Template of the route matched by the router, from its scope (`route`,
+    set by recent Starlette versions and FastAPI, else `endpoint`), mapped
+    to the full template once per route of the application
+    """
+    route = scope.get("route") or scope.get("endpoint")
+    if route is None:
+        return None
+    try:
+        templates = app._serverless_sdk_routes
+    except AttributeError:
+        templates = app._serverless_sdk_routes = {}
+    try:
+        return templates[id(route)]
+    except KeyError:
+        # added since the templates were mapped
+        templates.update(starlette_route_templates(app.router.routes))
+        return templates.setdefault(id(route), getattr(route, "path", None))
+
+
+def start_route(sdk, method):
+    # labelled with the route once matched, see finish_route
+    span = sdk.user_span(method)
+    span.set_tag("httpMethod", method)
+    return span
+
+
+def finish_route(sdk, span, method, route, status, mechanism):
+    span.set_tag("label", "{} {}".format(method, route or "(unmatched)"))
+    span.set_tag("endpoint", route)
+    span.set_tag("httpStatus", status)
+    sdk.invocation.set_endpoint(
+        endpoint=route,
+        http_method=method,
+        http_status_code=status,
+        meta={"mechanism": mechanism},
+    )
+
+
+def wsgi_wrapper(sdk, matched_route, mechanism):
+    """
+    Wraps the WSGI entry point of an application, e.g. `Flask.wsgi_app`,
+    getting the route matched from `matched_route(app, environ)` once the
+    request is dispatched
+    """
+
+    def wrapper(wrapped, app, args, kwargs):
+        environ, start_response = args[:2]
+        if ROUTE_KEY in environ:
+            return wrapped(*args, **kwargs)
+        environ[ROUTE_KEY] = None
+        method = environ.get("REQUEST_METHOD")
+        status = []
+
+        def capture_status(status_line, headers, *exc_info):
+            status.append(status_line.split(" ", 1)[0])
+            return start_response(status_line, headers, *exc_info)
+
+        with start_route(sdk, method) as span:
+            try:
+                return wrapped(environ, capture_status, *args[2:], **kwargs)
+            finally:
+                finish_route(
+                    sdk,
+                    span,
+                    method,
+                    matched_route(app, environ),
+                    status[-1] if status else None,
+                    mechanism,
+                )
+
+    return wrapper
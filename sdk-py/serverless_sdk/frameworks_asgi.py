@@ -0,0 +1,37 @@
+from serverless_sdk.frameworks import ROUTE_KEY, finish_route, start_route
+
+
+def asgi_wrapper(sdk, matched_route, mechanism):
+    """
+    Wraps the ASGI entry point of an application, e.g. `Starlette.__call__`,
+    getting the route matched from `matched_route(app, scope)` once the
+    request is dispatched
+    """
+
+    async def wrapper(wrapped, app, args, kwargs):
+        scope, receive, send = args[:3]
+        if scope.get("type") != "http" or ROUTE_KEY in scope:
+            return await wrapped(*args, **kwargs)
+        scope[ROUTE_KEY] = None
+        method = scope.get("method")
+        status = []
+
+        async def capture_status(message):
+            if message.get("type") == "http.response.start":
+                status.append(message.get("status"))
+            await send(message)
+
+        with start_route(sdk, method) as span:
+            try:
+                return await wrapped(scope, receive, capture_status, *args[3:], **kwargs)
+            finally:
+                finish_route(
+                    sdk,
+                    span,
+                    method,
+                    matched_route(app, scope),
+                    status[-1] if status else None,
+                    mechanism,
+                )
+
+    return wrapper
@@ -0,0 +1,118 @@
+import gc
+import os
+import sys
+
+from serverless_sdk.spans import Span, get_clock_anchor, now_ns
+from serverless_sdk.util import number_from_env
+
+DEFAULT_LONG_PAUSE_MS = 10
+# long pauses recorded as spans per invocation, the others are only counted
+MAX_PAUSE_SPANS = 10
+GENERATIONS = 3
+
+get_allocated_blocks = getattr(sys, "getallocatedblocks", None)  # python 3.4+
+
+
+class GcMonitor(object):
+    """
+    Times garbage collections through `gc.callbacks` (python 3.3+) and
+    reports, per invocation, the pause time and count of collections by
+    generation, the objects collected and how many pauses were longer than
+    `long_pause_ms`. Those long pauses are also recorded as "gc" spans, so
+    they show on the timeline of the transaction. With `allocated_blocks`,
+    also reports the change of `sys.getallocatedblocks()` over the
+    invocation.
+
+    Enabled with `SERVERLESS_ENTERPRISE_GC_STATS`, configured with
+    `SERVERLESS_ENTERPRISE_GC_LONG_PAUSE_MS` and
+    `SERVERLESS_ENTERPRISE_GC_ALLOCATED_BLOCKS`.
+    """
+
+    def __init__(self, long_pause_ms=DEFAULT_LONG_PAUSE_MS, allocated_blocks=False):
+        self.long_pause_ns = int(long_pause_ms * 1000000)
+        self.allocated_blocks = allocated_blocks and get_allocated_blocks is not None
+        self.started_ns = None
+        self.reset()
+        gc.callbacks.append(self.callback)
+
+    @classmethod
+    def from_env(cls):
+        if not os.environ.get("SERVERLESS_ENTERPRISE_GC_STATS") or not hasattr(
+            gc, "callbacks"
+        ):
+            return None
+        return cls(
+            number_from_env(
+                "SERVERLESS_ENTERPRISE_GC_LONG_PAUSE_MS", DEFAULT_LONG_PAUSE_MS
+            ),
+            bool(os.environ.get("SERVERLESS_ENTERPRISE_GC_ALLOCATED_BLOCKS")),
+        )
+
+    def reset(self):
+        self.collections = [0] * GENERATIONS
+        self.pauses_ns = [0] * GENERATIONS
+        self.max_pause_ns = 0
+        self.long_pauses = []
+        self.long_pause_count = 0
+        self.collected = 0
+        self.uncollectable = 0
+        self.blocks = get_allocated_blocks() if self.allocated_blocks else None
+
+    def callback(self, phase, info):
+        # collections run with the GIL held, from whichever thread triggers one
+        if phase == "start":
+            self.started_ns = now_ns()
+            return
+        started_ns = self.started_ns
+        if started_ns is None:
+            return
+        self.started_ns = None
+        ended_ns = now_ns()
+        pause_ns = ended_ns - started_ns
+        generation = info["generation"]
+        self.collections[generation] += 1
+        self.pauses_ns[generation] += pause_ns
+        if pause_ns > self.max_pause_ns:
+            self.max_pause_ns = pause_ns
+        self.collected += info["collected"]
+        self.uncollectable += info["uncollectable"]
+        if pause_ns >= self.long_pause_ns:
+            self.long_pause_count += 1
+            if len(self.long_pauses) < MAX_PAUSE_SPANS:
+                self.long_pauses.append((generation, started_ns, ended_ns))
+
+    def start(self):
+        self.reset()
+
+    def stop(self, collector):
+        """
+        Stats of the invocation, None when nothing happened. Long pauses are
+        appended to `collector` as spans.
+        """
+        anchor = get_clock_anchor()
+        for generation, started_ns, ended_ns in self.long_pauses:
+            span = Span(collector.append, "custom")
+            span.set_tag("label", "gc")
+            span.set_tag("gcGeneration", generation)
+            span.anchor = anchor
+            span.start_ns = started_ns
+            span.end_ns = ended_ns
+            collector.append(span)
+        blocks_delta = (
+            get_allocated_blocks() - self.blocks if self.blocks is not None else None
+        )
+        collections = self.collections
+        if not any(collections) and not blocks_delta:
+            return None
+        return {
+            "pauseMs": round(sum(self.pauses_ns) / 1000000.0, 3),
+            "maxPauseMs": round(self.max_pause_ns / 1000000.0, 3),
+            "pauseMsByGeneration": [
+                round(pause_ns / 1000000.0, 3) for pause_ns in self.pauses_ns
+            ],
+            "collections": list(collections),
+            "longPauses": self.long_pause_count,
+            "collected": self.collected,
+            "uncollectable": self.uncollectable,
+            "allocatedBlocksDelta": blocks_delta,
+        }
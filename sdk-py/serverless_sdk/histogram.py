@@ -0,0 +1,73 @@
+import math
+
+# 8 buckets per power of two: values are reported within ~4.5% of the truth
+BUCKETS_PER_OCTAVE = 8
+# bucket indexes are clamped to this range (2^-20 .. 2^44), bounding memory
+MIN_INDEX = -20 * BUCKETS_PER_OCTAVE
+MAX_INDEX = 44 * BUCKETS_PER_OCTAVE
+
+_SCALE = BUCKETS_PER_OCTAVE / math.log(2)
+
+
+class LogHistogram(object):
+    """
+    Fixed memory histogram of non-negative values with logarithmically sized
+    buckets. Tracks exact count, total, min and max, and approximate
+    quantiles. Recording a value allocates nothing for already seen buckets.
+    """
+
+    __slots__ = ("count", "total", "min", "max", "zeros", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.zeros = 0
+        self.buckets = {}
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = int(math.floor(math.log(value) * _SCALE))
+        if index < MIN_INDEX:
+            index = MIN_INDEX
+        elif index > MAX_INDEX:
+            index = MAX_INDEX
+        buckets = self.buckets
+        buckets[index] = buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+        self.zeros += other.zeros
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = self.zeros
+        if seen >= rank:
+            return self.min if self.min < 0 else 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # geometric middle of the bucket, clamped to observed values
+                value = math.exp((index + 0.5) / _SCALE)
+                return max(self.min, min(self.max, value))
+        return self.max
@@ -0,0 +1,72 @@
+import os
+
+from serverless_sdk.util import bounded_cache
+
+DECISION_CACHE_SIZE = 256
+
+
+def _parse_hosts(value):
+    return [domain.strip().lower() for domain in value.split(",") if domain.strip()]
+
+
+class HostMatcher(object):
+    """
+    Matches lowercase hostnames against a list of patterns:
+    - `*` matches any host,
+    - `*.example.com` and `.example.com` match subdomains of example.com,
+    - anything else is an exact match.
+    """
+
+    def __init__(self, patterns):
+        self.match_all = False
+        exact = set()
+        suffixes = []
+        for pattern in patterns:
+            if pattern == "*":
+                self.match_all = True
+            elif pattern.startswith("*."):
+                suffixes.append(pattern[1:])
+            elif pattern.startswith("."):
+                suffixes.append(pattern)
+            else:
+                exact.add(pattern)
+        self.exact = frozenset(exact)
+        self.suffixes = tuple(suffixes)
+
+    def matches(self, host):
+        return (
+            self.match_all
+            or host in self.exact
+            or host.endswith(self.suffixes)
+        )
+
+
+class HostFilter(object):
+    """
+    Decides whether HTTP requests to a host are recorded as spans.
+
+    Patterns are compiled once, decisions are cached per (raw) hostname in
+    a bounded cache, so repeated hosts cost a single lookup.
+    """
+
+    def __init__(self, capture, ignore, cache_size=DECISION_CACHE_SIZE):
+        self.capture = HostMatcher(capture)
+        self.ignore = HostMatcher(ignore)
+        self.should_capture = bounded_cache(self._decide, cache_size)
+
+    @classmethod
+    def from_env(cls):
+        if "SERVERLESS_ENTERPRISE_SPANS_CAPTURE_HOSTS" in os.environ:
+            capture = _parse_hosts(
+                os.environ["SERVERLESS_ENTERPRISE_SPANS_CAPTURE_HOSTS"]
+            )
+        else:
+            capture = ["*"]
+        ignore = _parse_hosts(
+            os.environ.get("SERVERLESS_ENTERPRISE_SPANS_IGNORE_HOSTS", "")
+        )
+        return cls(capture, ignore)
+
+    def _decide(self, host):
+        host = host.lower()
+        return self.capture.matches(host) and not self.ignore.matches(host)
@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+import uuid
+from collections import deque
+
+from serverless_sdk.batch_records import BatchRecords
+from serverless_sdk.collector import SpanCollector
+from serverless_sdk.event_detection import detect_event_type
+from serverless_sdk.metrics import metric
+from serverless_sdk.stacktrace import capture_error
+
+NO_ERROR = {
+    "errorCulprit": None,
+    "errorExceptionMessage": None,
+    "errorExceptionStacktrace": None,
+    "errorExceptionType": None,
+    "errorId": None,
+    "errorFatal": None,
+}
+
+TIMEOUT_MESSAGE = (
+    "Function execution duration going to exceeded configured timeout limit."
+)
+TIMEOUT_ERROR = {
+    "errorCulprit": "timeout",
+    "errorExceptionMessage": TIMEOUT_MESSAGE,
+    "errorExceptionStacktrace": "[]",
+    "errorExceptionType": "TimeoutError",
+    "errorFatal": True,
+    "errorId": "TimeoutError!$" + TIMEOUT_MESSAGE,
+}
+
+# only the last tags of an invocation are reported
+MAX_EVENT_TAGS = 10
+
+# `json.dumps` with the default separators, values that are not JSON
+# serializable are reported as strings
+encode_custom = json.JSONEncoder(default=str).encode
+
+# frames of these modules are skipped when capturing an exception never raised
+SDK_MODULES = frozenset(("serverless_sdk", __name__))
+
+
+def get_span_id(event, event_type):
+    """Transaction id, the API Gateway request id when there is one (access logs)"""
+    if event_type == "aws.apigateway.http":
+        request_context = event["requestContext"]
+        if isinstance(request_context, dict) and "requestId" in request_context:
+            return request_context["requestId"]
+    return str(uuid.uuid4())
+
+
+def format_event_tags(event_tags):
+    """`eventTags` of the transaction, see Invocation.tag_event"""
+    return [
+        {"tagName": tag, "tagValue": value, "custom": custom}
+        for tag, value, custom in event_tags
+    ]
+
+
+class Invocation(object):
+    """
+    State of the running invocation and the API exposed to the user as
+    `context.serverless_sdk` and the module level functions.
+
+    Created once per container and reset at the start of every invocation,
+    instead of defining closures and a wrapper class per invocation.
+    Everything the transaction is built from is snapshotted when it ends,
+    so resetting never affects a transaction still being emitted.
+    """
+
+    __slots__ = (
+        "sdk",
+        "context",
+        "function_name",
+        "timeout",
+        "start",
+        "start_isoformat",
+        "span_id",
+        "event_type",
+        "event_source",
+        "spans",
+        "collector_token",
+        "event_tags",
+        "endpoint",
+        "http_method",
+        "http_status_code",
+        "endpoint_meta",
+        "error_data",
+        "exception",
+        "batch_records",
+        "processed",
+    )
+
+    # custom metrics, also `serverless_sdk.metric`
+    metric = metric
+
+    def __init__(self, sdk):
+        self.sdk = sdk
+        self.context = None
+        self.function_name = None
+        self.timeout = None
+        self.start = None
+        self.start_isoformat = None
+        self.span_id = None
+        self.event_type = None
+        self.event_source = None
+        # records the spans made on cold start, before the first invocation
+        self.spans = SpanCollector()
+        self.collector_token = None
+        self.event_tags = deque(maxlen=MAX_EVENT_TAGS)
+        self.endpoint = None
+        self.http_method = None
+        self.http_status_code = None
+        self.endpoint_meta = None
+        self.error_data = dict(NO_ERROR)
+        self.exception = None
+        self.batch_records = None
+        # set once the transaction is ended, on timeout or by the handler
+        self.processed = False
+
+    def reset(self, event, context, function_name, timeout, start, start_isoformat):
+        self.context = context
+        self.function_name = function_name
+        self.timeout = timeout
+        self.start = start
+        self.start_isoformat = start_isoformat
+        self.event_type, self.event_source = detect_event_type(event)
+        self.span_id = get_span_id(event, self.event_type)
+        if self.spans.closed:
+            self.spans = SpanCollector()
+        self.event_tags = deque(maxlen=MAX_EVENT_TAGS)
+        self.endpoint = None
+        self.http_method = None
+        self.http_status_code = None
+        self.endpoint_meta = None
+        self.error_data.update(NO_ERROR)
+        self.exception = None
+        self.batch_records = None
+        self.processed = False
+
+    def capture_fatal_exception(self, exception, tb):
+        self.exception = exception
+        self.error_data.update(capture_error(exception, True, tb=tb))
+
+    def capture_timeout(self):
+        self.error_data.update(TIMEOUT_ERROR)
+
+    def capture_exception(self, exception):
+        # for exceptions never raised, report the stack of the user's call
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_globals.get("__name__") in SDK_MODULES:
+            frame = frame.f_back
+        self.error_data.update(capture_error(exception, False, frame=frame))
+
+    def tag_event(self, tag, value="", custom=""):
+        # serialized right away, so later changes to `custom` aren't reported
+        # (nor raced by the transaction being encoded in the background)
+        self.event_tags.append((str(tag), str(value), encode_custom(custom)))
+
+    def span(self, span_type):
+        return self.sdk.user_span(span_type)
+
+    def batch(self, event):
+        """Records of the batch `event` (or a list of records), see `BatchRecords`"""
+        self.batch_records = BatchRecords(event)
+        return self.batch_records
+
+    def set_endpoint(self, endpoint, http_method=None, http_status_code=None, meta=None):
+        if endpoint:
+            self.endpoint = endpoint
+        if http_method:
+            self.http_method = http_method
+        if http_status_code:
+            self.http_status_code = str(http_status_code)
+        self.endpoint_meta = meta
+
+    def get_transaction_id(self):
+        return self.span_id
+
+    def get_dashboard_url(self, transaction_id=None):
+        sdk = self.sdk
+        domain = "serverless" if sdk.serverless_platform_stage == "prod" else "serverless-dev"
+        return "/".join(
+            [
+                "https://app.{}.com".format(domain),
+                sdk.org_id,
+                "apps",
+                sdk.application_name,
+                sdk.service_name,
+                sdk.stage_name,
+                os.environ.get("AWS_REGION"),
+                "explorer",
+                self.span_id if transaction_id is None else transaction_id,
+            ]
+        )
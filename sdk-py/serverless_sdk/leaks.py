@@ -0,0 +1,145 @@
+import random
+
+from serverless_sdk.util import monotonic, number_from_env
+
+try:
+    import tracemalloc  # python 3.4+
+except ImportError:
+    tracemalloc = None
+
+DEFAULT_INTERVAL = 100
+DEFAULT_FRAMES = 1
+DEFAULT_TOP_SITES = 10
+# snapshots in a row with more traced memory than the previous one, for the
+# container to be flagged as leaking
+GROWTH_STREAK = 5
+
+
+class LeakDetector(object):
+    """
+    Finds memory retained across invocations of a warm container: traces
+    allocations with `tracemalloc` (keeping `frames` frames per allocation)
+    and every `interval` invocations snapshots them. The transaction of that
+    invocation reports the allocation sites that grew the most since the
+    previous snapshot, and whether traced memory grew over the last
+    `GROWTH_STREAK` snapshots in a row (a suspected leak).
+
+    Tracing slows allocations down, so it is enabled only in a fraction of
+    containers: `SERVERLESS_ENTERPRISE_LEAK_DETECTION` is the probability
+    of a container being traced (1 for all of them). Configured with
+    `SERVERLESS_ENTERPRISE_LEAK_DETECTION_INTERVAL`,
+    `SERVERLESS_ENTERPRISE_LEAK_DETECTION_FRAMES` and
+    `SERVERLESS_ENTERPRISE_LEAK_DETECTION_TOP_SITES`.
+    """
+
+    def __init__(
+        self, interval=DEFAULT_INTERVAL, frames=DEFAULT_FRAMES, top_sites=None
+    ):
+        self.interval = max(interval, 1)
+        self.frames = max(frames, 1)
+        self.top_sites = DEFAULT_TOP_SITES if top_sites is None else top_sites
+        self.invocations = 0
+        self.snapshot = None
+        self.traced_size = None
+        # traced memory held by `snapshot` itself, not counted as retained
+        self.snapshot_size = 0
+        self.growth_streak = 0
+        self.filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        # don't override the tracing set up by the user, if any
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    @classmethod
+    def from_env(cls):
+        if tracemalloc is None:
+            return None
+        rate = number_from_env("SERVERLESS_ENTERPRISE_LEAK_DETECTION", 0)
+        if rate <= 0 or random.random() >= rate:
+            return None
+        return cls(
+            number_from_env(
+                "SERVERLESS_ENTERPRISE_LEAK_DETECTION_INTERVAL", DEFAULT_INTERVAL, int
+            ),
+            number_from_env(
+                "SERVERLESS_ENTERPRISE_LEAK_DETECTION_FRAMES", DEFAULT_FRAMES, int
+            ),
+            number_from_env(
+                "SERVERLESS_ENTERPRISE_LEAK_DETECTION_TOP_SITES", DEFAULT_TOP_SITES, int
+            ),
+        )
+
+    def check(self):
+        """
+        Called at the end of every invocation, snapshots the traced
+        allocations every `interval` invocations. Returns the data of the
+        report (compared when the transaction is emitted, see
+        format_leak_report), None for other invocations.
+        """
+        self.invocations += 1
+        if self.invocations % self.interval:
+            return None
+        started = monotonic()
+        before = tracemalloc.get_traced_memory()[0]
+        traced_size = before - self.snapshot_size
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+        self.snapshot_size = tracemalloc.get_traced_memory()[0] - before
+        snapshot_duration = monotonic() - started
+
+        previous, self.snapshot = self.snapshot, snapshot
+        previous_size, self.traced_size = self.traced_size, traced_size
+        if previous_size is not None and traced_size > previous_size:
+            self.growth_streak += 1
+        else:
+            self.growth_streak = 0
+        return {
+            "snapshot": snapshot,
+            "previous": previous,
+            "key_type": "lineno" if self.frames == 1 else "traceback",
+            "top_sites": self.top_sites,
+            "report": {
+                "invocations": self.invocations,
+                "tracedBytes": traced_size,
+                "tracedGrowthBytes": traced_size - previous_size
+                if previous_size is not None
+                else None,
+                "growthStreak": self.growth_streak,
+                "suspectedLeak": self.growth_streak >= GROWTH_STREAK,
+                "tracemallocBytes": tracemalloc.get_tracemalloc_memory(),
+                "snapshotMs": round(snapshot_duration * 1000, 3),
+            },
+        }
+
+
+def format_site(traceback):
+    return " < ".join(
+        "{}:{}".format(frame.filename, frame.lineno) for frame in reversed(traceback)
+    )
+
+
+def format_leak_report(leaks):
+    """`memoryLeaks` tag of the transaction, sites compared to the previous snapshot"""
+    report = dict(leaks["report"])
+    previous = leaks["previous"]
+    if previous is None:
+        report["topGrowth"] = []
+        return report
+    started = monotonic()
+    stats = leaks["snapshot"].compare_to(previous, leaks["key_type"])
+    growing = [stat for stat in stats if stat.size_diff > 0]
+    growing.sort(key=lambda stat: stat.size_diff, reverse=True)
+    report["topGrowth"] = [
+        {
+            "site": format_site(stat.traceback),
+            "sizeDiff": stat.size_diff,
+            "countDiff": stat.count_diff,
+            "size": stat.size,
+        }
+        for stat in growing[: leaks["top_sites"]]
+    ]
+    report["compareMs"] = round((monotonic() - started) * 1000, 3)
+    return report
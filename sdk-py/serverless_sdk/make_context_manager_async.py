@@ -1,7 +1,9 @@
 def async_context_manager(context_manager):
     class AsyncContextManager(context_manager):
+        __slots__ = ()
+
         async def __aenter__(self):
-            self.__enter__()
+            return self.__enter__()
 
         async def __aexit__(self, exc_type, exc, tb):
             self.__exit__(exc_type, exc, tb)
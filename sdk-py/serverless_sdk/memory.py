@@ -0,0 +1,168 @@
+import json
+import os
+
+try:
+    import resource
+except ImportError:
+    resource = None  # not available outside of unix
+
+# enough for the cpu lines of /proc/stat up to ~100 cpus
+STAT_READ_SIZE = 8192
+
+
+def _open(path):
+    try:
+        return os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+
+
+if hasattr(os, "pread"):
+
+    def _read(fd, size, offset=0):
+        return os.pread(fd, size, offset)
+
+
+else:  # python 2
+
+    def _read(fd, size, offset=0):
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+
+def _meminfo_field(data, name):
+    start = data.find(name)
+    if start == -1:
+        return None
+    return int(data[start + len(name) : data.find(b"kB", start)]) * 1024
+
+
+class MemorySampler(object):
+    """
+    Samples system memory, process RSS and CPU times from procfs.
+
+    The proc files are opened once per container and re-read from offset 0 on
+    every sample, only the fields reported in transaction tags are parsed.
+    On systems without procfs every sampled value is `None`.
+    """
+
+    def __init__(self):
+        self._meminfo_fd = _open("/proc/meminfo")
+        self._statm_fd = _open("/proc/self/statm")
+        self._stat_fd = _open("/proc/stat")
+        try:
+            self._page_size = os.sysconf("SC_PAGE_SIZE")
+            self._ms_per_tick = 1000.0 / os.sysconf("SC_CLK_TCK")
+        except (AttributeError, ValueError, OSError):
+            self._page_size = 4096
+            self._ms_per_tick = 10.0
+        self._cpu_models = self._read_cpu_models()
+
+    def sample(self):
+        memory_total, memory_free = self.read_meminfo()
+        return {
+            "memory_total": memory_total,
+            "memory_free": memory_free,
+            "rss": self.read_rss(),
+            "peak_rss": self.read_peak_rss(),
+            "cpus": self.read_cpus(),
+        }
+
+    def read_meminfo(self):
+        if self._meminfo_fd is None:
+            return None, None
+        # MemTotal and MemFree open the file, no need to read all of it
+        data = _read(self._meminfo_fd, 256)
+        return (
+            _meminfo_field(data, b"MemTotal:"),
+            _meminfo_field(data, b"MemFree:"),
+        )
+
+    def read_rss(self):
+        if self._statm_fd is None:
+            return None
+        # statm: size resident shared text lib data dt (in pages)
+        data = _read(self._statm_fd, 128)
+        start = data.index(b" ") + 1
+        return int(data[start : data.index(b" ", start)]) * self._page_size
+
+    def read_peak_rss(self):
+        if resource is None:
+            return None
+        # ru_maxrss is reported in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def read_cpus(self):
+        """CPU times in the format of Node.js `os.cpus()`, as in the JS SDK"""
+        if self._stat_fd is None:
+            return None
+        cpus = []
+        for line in self._read_cpu_lines():
+            if not line.startswith(b"cpu"):
+                break
+            if line[3:4] == b" ":  # aggregate of all cpus
+                continue
+            # cpuN user nice system idle iowait irq ...
+            fields = line.split()
+            index = len(cpus)
+            model, speed = (
+                self._cpu_models[index]
+                if index < len(self._cpu_models)
+                else (None, None)
+            )
+            ms_per_tick = self._ms_per_tick
+            cpus.append(
+                {
+                    "model": model,
+                    "speed": speed,
+                    "times": {
+                        "user": int(int(fields[1]) * ms_per_tick),
+                        "nice": int(int(fields[2]) * ms_per_tick),
+                        "sys": int(int(fields[3]) * ms_per_tick),
+                        "idle": int(int(fields[4]) * ms_per_tick),
+                        "irq": int(int(fields[6]) * ms_per_tick),
+                    },
+                }
+            )
+        return cpus
+
+    def _read_cpu_lines(self):
+        """Lines of /proc/stat up to the first one after the cpu lines"""
+        data = b""
+        while True:
+            chunk = _read(self._stat_fd, STAT_READ_SIZE, len(data))
+            data += chunk
+            lines = data.split(b"\n")
+            # the cpu lines come first, on hosts with many cpus they take more
+            # than one read; the last line may be cut
+            if not chunk or (len(lines) > 1 and not lines[-2].startswith(b"cpu")):
+                return lines
+
+    @staticmethod
+    def _read_cpu_models():
+        models = []
+        try:
+            with open("/proc/cpuinfo") as cpuinfo:
+                model = None
+                for line in cpuinfo:
+                    key, _, value = line.partition(":")
+                    key = key.strip()
+                    if key == "model name":
+                        model = value.strip()
+                    elif key == "cpu MHz":
+                        models.append((model, int(float(value))))
+        except (IOError, OSError, ValueError):
+            pass
+        return models
+
+
+def format_memory_used(sample):
+    if sample["rss"] is None:
+        return None
+    return json.dumps({"rss": sample["rss"], "peakRss": sample["peak_rss"]})
+
+
+def format_cpus(sample):
+    if sample["cpus"] is None:
+        return None
+    return json.dumps(sample["cpus"])
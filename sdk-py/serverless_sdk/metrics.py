@@ -0,0 +1,181 @@
+import threading
+
+from serverless_sdk.histogram import LogHistogram
+
+# metrics registered past this many are still usable but never reported
+MAX_METRICS = 100
+
+
+class Counter(object):
+    """Sum of the increments made during the transaction"""
+
+    __slots__ = ("name", "value", "lock")
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def collect(self, blocking=True):
+        if not self.lock.acquire(blocking):
+            return None
+        try:
+            value = self.value
+            if not value:
+                return None
+            self.value = 0
+        finally:
+            self.lock.release()
+        return (self.name, "counter", value)
+
+
+class Gauge(object):
+    """Last value set during the transaction"""
+
+    __slots__ = ("name", "value")
+
+    def __init__(self, name):
+        self.name = name
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def collect(self, blocking=True):
+        value = self.value
+        if value is None:
+            return None
+        self.value = None
+        return (self.name, "gauge", value)
+
+
+class Histogram(object):
+    """Distribution of the values recorded during the transaction"""
+
+    __slots__ = ("name", "histogram", "lock")
+
+    def __init__(self, name):
+        self.name = name
+        self.histogram = LogHistogram()
+        self.lock = threading.Lock()
+
+    def record(self, value):
+        with self.lock:
+            self.histogram.record(value)
+
+    def collect(self, blocking=True):
+        if not self.lock.acquire(blocking):
+            return None
+        try:
+            histogram = self.histogram
+            if not histogram.count:
+                return None
+            # summarized when the transaction is emitted, off the handler's path
+            self.histogram = LogHistogram()
+        finally:
+            self.lock.release()
+        return (self.name, "histogram", histogram)
+
+
+class Metrics(object):
+    """
+    Custom metrics, aggregated in process and reported once per transaction
+    (`metrics` next to `eventTags`), exposed as `serverless_sdk.metric`:
+
+        serverless_sdk.metric.increment("orders")
+        serverless_sdk.metric.record("basket_size", len(items))
+
+    Metrics may be recorded from any thread. In hot loops, get the metric
+    once and record through it, which costs an attribute lookup and an
+    addition (or a histogram bucket increment) under an uncontended lock:
+
+        processed = serverless_sdk.metric.counter("processed")
+        for item in items:
+            processed.inc()
+
+    Metrics live for the whole container and are reset whenever a
+    transaction is reported. Only metrics recorded during a transaction are
+    reported with it.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def get(self, name, metric_class):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = metric_class(name)
+            if len(self.metrics) < MAX_METRICS:
+                # the first one registered wins when threads race
+                metric = self.metrics.setdefault(name, metric)
+        if not isinstance(metric, metric_class):
+            raise TypeError(
+                "metric {!r} is a {}, not a {}".format(
+                    name, type(metric).__name__, metric_class.__name__
+                )
+            )
+        return metric
+
+    def counter(self, name):
+        return self.get(name, Counter)
+
+    def gauge(self, name):
+        return self.get(name, Gauge)
+
+    def histogram(self, name):
+        return self.get(name, Histogram)
+
+    def increment(self, name, amount=1):
+        self.get(name, Counter).inc(amount)
+
+    def set(self, name, value):
+        self.get(name, Gauge).set(value)
+
+    def record(self, name, value):
+        self.get(name, Histogram).record(value)
+
+    def collect(self, blocking=True):
+        """
+        Values recorded since the last call, to report with a transaction.
+
+        Unless `blocking`, metrics being recorded at the time are skipped
+        (and left for the next call) instead of waited for: on timeout this
+        runs in the SIGTERM handler, which may have interrupted the main
+        thread in the middle of recording one, while holding its lock.
+        """
+        collected = []
+        for metric in list(self.metrics.values()):
+            value = metric.collect(blocking)
+            if value is not None:
+                collected.append(value)
+        return collected
+
+
+def format_metrics(collected):
+    metrics = []
+    for name, metric_type, value in collected:
+        if metric_type != "histogram":
+            metrics.append({"name": name, "type": metric_type, "value": value})
+            continue
+        metrics.append(
+            {
+                "name": name,
+                "type": metric_type,
+                "count": value.count,
+                "total": value.total,
+                "min": value.min,
+                "max": value.max,
+                "p50": value.quantile(0.5),
+                "p95": value.quantile(0.95),
+                "p99": value.quantile(0.99),
+            }
+        )
+    return metrics
+
+
+# the metrics of the container, see Metrics
+metric = Metrics()
@@ -0,0 +1,190 @@
+import os
+import sys
+import threading
+
+try:
+    from threading import get_ident  # python 3
+except ImportError:
+    from thread import get_ident  # python 2
+
+from serverless_sdk.util import monotonic, number_from_env
+
+DEFAULT_INTERVAL_MS = 10
+DEFAULT_THRESHOLD_MS = 1000
+DEFAULT_TOP_STACKS = 20
+# distinct stacks kept per invocation, samples of any other one are counted
+# in `otherSamples`
+MAX_STACKS = 500
+MAX_DEPTH = 64
+# share of the invocation the profiler may spend sampling, the interval is
+# doubled (up to MAX_INTERVAL_MS) while it goes over and restored under it
+DEFAULT_OVERHEAD_BUDGET = 0.01
+MAX_INTERVAL_MS = 1000
+
+
+def format_frame(code):
+    return "{} ({}:{})".format(
+        code.co_name, os.path.basename(code.co_filename), code.co_firstlineno
+    )
+
+
+class SamplingProfiler(object):
+    """
+    Statistical CPU profiler of the thread running the handler: a single
+    background thread reads its stack through `sys._current_frames()` every
+    `interval` while an invocation runs, and counts samples per stack.
+
+    Stacks are keyed by their code objects, formatted as folded stacks
+    (`root;...;leaf`) only for the profiles reported, those of invocations
+    slower than `threshold`.
+
+    The time spent sampling is measured, and the interval adapted so it
+    stays within `overhead_budget` of the invocation duration.
+
+    Enabled with `SERVERLESS_ENTERPRISE_PROFILER`, configured with
+    `SERVERLESS_ENTERPRISE_PROFILER_INTERVAL_MS`,
+    `SERVERLESS_ENTERPRISE_PROFILER_THRESHOLD_MS`,
+    `SERVERLESS_ENTERPRISE_PROFILER_TOP_STACKS` and
+    `SERVERLESS_ENTERPRISE_PROFILER_OVERHEAD_BUDGET`.
+    """
+
+    def __init__(
+        self, interval_ms=None, threshold_ms=None, top_stacks=None, overhead_budget=None
+    ):
+        if interval_ms is None:
+            interval_ms = number_from_env(
+                "SERVERLESS_ENTERPRISE_PROFILER_INTERVAL_MS", DEFAULT_INTERVAL_MS
+            )
+        if threshold_ms is None:
+            threshold_ms = number_from_env(
+                "SERVERLESS_ENTERPRISE_PROFILER_THRESHOLD_MS", DEFAULT_THRESHOLD_MS
+            )
+        if top_stacks is None:
+            top_stacks = int(
+                number_from_env(
+                    "SERVERLESS_ENTERPRISE_PROFILER_TOP_STACKS", DEFAULT_TOP_STACKS
+                )
+            )
+        if overhead_budget is None:
+            overhead_budget = number_from_env(
+                "SERVERLESS_ENTERPRISE_PROFILER_OVERHEAD_BUDGET",
+                DEFAULT_OVERHEAD_BUDGET,
+            )
+        self.base_interval = max(interval_ms, 1) / 1000.0
+        self.interval = self.base_interval
+        self.threshold_ms = threshold_ms
+        self.top_stacks = top_stacks
+        self.overhead_budget = overhead_budget
+        self._condition = threading.Condition()
+        self._thread = None
+        self._target = None
+        self._stacks = {}
+        self._samples = 0
+        self._other = 0
+        self._overhead = 0.0
+
+    @classmethod
+    def from_env(cls):
+        if not os.environ.get("SERVERLESS_ENTERPRISE_PROFILER"):
+            return None
+        return cls()
+
+    def start(self):
+        """Starts profiling the calling thread"""
+        with self._condition:
+            self._stacks = {}
+            self._samples = 0
+            self._other = 0
+            self._overhead = 0.0
+            self._target = get_ident()
+            if self._thread is None:
+                thread = threading.Thread(
+                    target=self._sample, name="serverless-sdk-profiler"
+                )
+                thread.daemon = True
+                thread.start()
+                self._thread = thread
+            self._condition.notify()
+
+    def stop(self, duration_ms):
+        """
+        Stops profiling, returns the profile when the invocation took over
+        `threshold_ms` (None otherwise) and the time spent sampling, in ms
+        """
+        with self._condition:
+            self._target = None
+            stacks = self._stacks
+            samples = self._samples
+            other = self._other
+            overhead_ms = self._overhead * 1000
+            interval = self.interval
+        self.adapt(overhead_ms, duration_ms)
+        if duration_ms < self.threshold_ms or not samples:
+            return None, overhead_ms
+        top = sorted(stacks.items(), key=lambda item: item[1], reverse=True)
+        other += sum(count for _, count in top[self.top_stacks :])
+        return (
+            {
+                "intervalMs": interval * 1000,
+                "samples": samples,
+                "otherSamples": other,
+                # formatted when the transaction is emitted, see format_profile
+                "stacks": top[: self.top_stacks],
+            },
+            overhead_ms,
+        )
+
+    def adapt(self, overhead_ms, duration_ms):
+        if not duration_ms:
+            return
+        share = overhead_ms / duration_ms
+        if share > self.overhead_budget:
+            self.interval = min(self.interval * 2, MAX_INTERVAL_MS / 1000.0)
+        elif share < self.overhead_budget / 4 and self.interval > self.base_interval:
+            self.interval = max(self.interval / 2, self.base_interval)
+
+    def _sample(self):
+        condition = self._condition
+        with condition:
+            while True:
+                if self._target is None:
+                    condition.wait()
+                    continue
+                # sleeps with the lock released, so start and stop don't wait
+                condition.wait(self.interval)
+                target = self._target
+                if target is None:
+                    continue
+                started = monotonic()
+                frame = sys._current_frames().get(target)
+                if frame is not None:
+                    self._record(frame)
+                self._overhead += monotonic() - started
+
+    def _record(self, frame):
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        key = tuple(stack)
+        stacks = self._stacks
+        self._samples += 1
+        if key in stacks:
+            stacks[key] += 1
+        elif len(stacks) < MAX_STACKS:
+            stacks[key] = 1
+        else:
+            self._other += 1
+
+
+def format_profile(profile):
+    """`cpuProfile` tag of the transaction, with folded stacks (root first)"""
+    profile = dict(profile)
+    profile["stacks"] = [
+        {
+            "stack": ";".join(format_frame(code) for code in reversed(key)),
+            "samples": count,
+        }
+        for key, count in profile["stacks"]
+    ]
+    return profile
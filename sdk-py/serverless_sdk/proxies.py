@@ -0,0 +1,36 @@
+import sys
+
+from serverless_sdk.vendor import wrapt as vendored_wrapt
+
+
+def has_extension(module):
+    """Whether `module` (a wrapt package) uses its compiled `_wrappers`"""
+    return module.__name__ + "._wrappers" in sys.modules
+
+
+def load_wrapt():
+    """
+    Picks the wrapt implementation that wraps instrumented calls, returns
+    `(module, implementation)`:
+    - the vendored copy when its C extension loads, it is only built for the
+      runtime it was vendored with (see vendorize-wrapt.sh),
+    - else `wrapt` from the deployment package or a layer, when it is compiled
+      for the running Python,
+    - else the vendored pure Python fallback.
+    `WRAPT_DISABLE_EXTENSIONS` disables the extensions as wrapt itself does.
+    """
+    if has_extension(vendored_wrapt):
+        return vendored_wrapt, "vendored-extension"
+    try:
+        import wrapt
+    except ImportError:
+        return vendored_wrapt, "vendored-python"
+    if has_extension(wrapt) and all(
+        hasattr(wrapt, name)
+        for name in ("wrap_function_wrapper", "register_post_import_hook")
+    ):
+        return wrapt, "native-extension"
+    return vendored_wrapt, "vendored-python"
+
+
+wrapt, wrapt_implementation = load_wrapt()
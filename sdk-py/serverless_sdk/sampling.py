@@ -0,0 +1,108 @@
+import random
+import time
+
+from serverless_sdk.histogram import LogHistogram
+from serverless_sdk.util import number_from_env
+
+# every transaction is emitted unless a lower rate is configured
+DEFAULT_RATE = 1.0
+DEFAULT_OUTLIER_QUANTILE = 0.99
+DEFAULT_SUMMARY_INTERVAL = 60.0
+# durations per window of the rolling histogram outliers are judged against,
+# the first threshold is computed after MIN_WINDOW_SIZE transactions
+WINDOW_SIZE = 1000
+MIN_WINDOW_SIZE = 100
+
+
+class TransactionSampler(object):
+    """
+    Decides which transactions of the container are emitted:
+    - errors, timeouts and cold starts always are,
+    - other ones are kept at random with probability `rate`, or when their
+      duration is over the `outlier_quantile` of the recent ones (a rolling
+      histogram of the last `WINDOW_SIZE` durations of the container).
+    Transactions sampled out are folded into a summary of their count and
+    durations, emitted every `summary_interval` seconds at the end of a
+    transaction (and on SIGTERM, before the container is shut down), so
+    aggregates stay accurate.
+
+    Configured with `SERVERLESS_ENTERPRISE_SAMPLE_RATE`,
+    `SERVERLESS_ENTERPRISE_SAMPLE_OUTLIER_QUANTILE` and
+    `SERVERLESS_ENTERPRISE_SAMPLE_SUMMARY_INTERVAL`.
+    """
+
+    def __init__(self, rate=None, outlier_quantile=None, summary_interval=None):
+        if rate is None:
+            rate = number_from_env("SERVERLESS_ENTERPRISE_SAMPLE_RATE", DEFAULT_RATE)
+        if outlier_quantile is None:
+            outlier_quantile = number_from_env(
+                "SERVERLESS_ENTERPRISE_SAMPLE_OUTLIER_QUANTILE",
+                DEFAULT_OUTLIER_QUANTILE,
+            )
+        if summary_interval is None:
+            summary_interval = number_from_env(
+                "SERVERLESS_ENTERPRISE_SAMPLE_SUMMARY_INTERVAL",
+                DEFAULT_SUMMARY_INTERVAL,
+            )
+        self.rate = min(max(rate, 0.0), 1.0)
+        self.outlier_quantile = outlier_quantile
+        self.summary_interval = summary_interval
+        self.enabled = self.rate < 1
+        self.window = LogHistogram()
+        self.threshold = None
+        self.summary = LogHistogram()
+        self.summary_started = None
+
+    def decide(self, duration, always=False):
+        """
+        Records `duration` (in milliseconds) and returns why the transaction
+        is kept ("always", "outlier" or "rate"), or None when it is sampled out
+        """
+        window = self.window
+        window.record(duration)
+        if window.count >= WINDOW_SIZE or (
+            self.threshold is None and window.count == MIN_WINDOW_SIZE
+        ):
+            self.threshold = window.quantile(self.outlier_quantile)
+            if window.count >= WINDOW_SIZE:
+                self.window = LogHistogram()
+        if always:
+            return "always"
+        if self.threshold is not None and duration > self.threshold:
+            return "outlier"
+        if random.random() < self.rate:
+            return "rate"
+        if self.summary_started is None:
+            self.summary_started = time.time()
+        self.summary.record(duration)
+        return None
+
+    def pop_summary(self, force=False):
+        """
+        Summary of the transactions sampled out, once `summary_interval` has
+        passed since the first of them (right away with `force`), None until
+        then
+        """
+        started = self.summary_started
+        if started is None:
+            return None
+        now = time.time()
+        if now - started < self.summary_interval and not force:
+            return None
+        summary = self.summary
+        self.summary = LogHistogram()
+        self.summary_started = None
+        return {
+            "startTime": started,
+            "endTime": now,
+            "count": summary.count,
+            "sampleRate": self.rate,
+            "duration": {
+                "total": summary.total,
+                "min": summary.min,
+                "max": summary.max,
+                "p50": summary.quantile(0.5),
+                "p95": summary.quantile(0.95),
+                "p99": summary.quantile(0.99),
+            },
+        }
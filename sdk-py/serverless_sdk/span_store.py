@@ -0,0 +1,159 @@
+import heapq
+import os
+import random
+
+from serverless_sdk.histogram import LogHistogram
+from serverless_sdk.util import number_from_env
+
+DEFAULT_CAPACITY = 50
+# overflow spans of further (type, host, operation) keys share a per type one
+MAX_AGGREGATES = 50
+
+STRATEGIES = ("first", "reservoir", "slowest")
+
+
+def _span_key(span):
+    tags = span.tags or {}
+    span_type = span.span_type
+    if span_type == "aws":
+        operation = (tags.get("aws") or {}).get("operation")
+    elif span_type == "http":
+        operation = tags.get("httpMethod")
+    else:
+        operation = tags.get("label")
+    return (span_type, tags.get("requestHostname"), operation)
+
+
+class SpanAggregate(object):
+    __slots__ = ("histogram",)
+
+    def __init__(self):
+        self.histogram = LogHistogram()
+
+    def dump(self, key):
+        histogram = self.histogram
+        span_type, hostname, operation = key
+        return {
+            "type": span_type,
+            "requestHostname": hostname,
+            "operation": operation,
+            "count": histogram.count,
+            "totalDuration": round(histogram.total, 3),
+            "minDuration": round(histogram.min, 3),
+            "maxDuration": round(histogram.max, 3),
+            "p95Duration": round(histogram.quantile(0.95), 3),
+        }
+
+
+class SpanStore(object):
+    """
+    Bounded store of the spans of a transaction.
+
+    Keeps at most `capacity` spans, picked with one of `STRATEGIES`:
+    - "first": the first spans recorded,
+    - "reservoir": a uniform random sample of all spans,
+    - "slowest": the spans with the longest durations.
+    Spans not kept are folded into per (type, host, operation) aggregates
+    with count and total/min/max/p95 durations (in milliseconds).
+    """
+
+    def __init__(self, capacity=None, strategy=None):
+        if capacity is None:
+            capacity = number_from_env(
+                "SERVERLESS_ENTERPRISE_SPANS_MAX", DEFAULT_CAPACITY, int
+            )
+        if strategy is None:
+            strategy = os.environ.get("SERVERLESS_ENTERPRISE_SPANS_SAMPLING", "first")
+        if strategy not in STRATEGIES:
+            strategy = "first"
+        self.capacity = max(capacity, 0)
+        self.strategy = strategy
+        self.seen = 0
+        self._kept = []
+        self._aggregates = {}
+        if strategy == "reservoir":
+            self.append = self._append_reservoir
+        elif strategy == "slowest":
+            self.append = self._append_slowest
+        else:
+            self.append = self._append_first
+
+    @classmethod
+    def merge(cls, stores):
+        """
+        Merges stores (e.g. one per thread) into a new one, re-selecting the
+        kept spans among all of them and combining aggregates
+        """
+        merged = cls(capacity=stores[0].capacity, strategy=stores[0].strategy)
+        kept = []
+        for store in stores:
+            kept.extend(store.spans())
+            for key, aggregate in store._aggregates.items():
+                target = merged._aggregates.get(key)
+                if target is None:
+                    target = merged._aggregates[key] = SpanAggregate()
+                target.histogram.merge(aggregate.histogram)
+        kept.sort(key=lambda span: span.start_ns)
+        for span in kept:
+            merged.append(span)
+        merged.seen = sum(store.seen for store in stores)
+        return merged
+
+    def __len__(self):
+        return len(self._kept)
+
+    def spans(self):
+        """Kept spans, in order of start"""
+        if self.strategy == "slowest":
+            spans = [span for _, _, span in self._kept]
+        else:
+            spans = list(self._kept)
+        if self.strategy != "first":
+            spans.sort(key=lambda span: span.start_ns)
+        return spans
+
+    def aggregates(self):
+        return [
+            aggregate.dump(key) for key, aggregate in self._aggregates.items()
+        ]
+
+    def _aggregate(self, span):
+        key = _span_key(span)
+        aggregate = self._aggregates.get(key)
+        if aggregate is None:
+            if len(self._aggregates) >= MAX_AGGREGATES:
+                key = (key[0], None, None)
+                aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = SpanAggregate()
+        aggregate.histogram.record((span.end_ns - span.start_ns) / 1000000.0)
+
+    def _append_first(self, span):
+        self.seen += 1
+        if len(self._kept) < self.capacity:
+            self._kept.append(span)
+        else:
+            self._aggregate(span)
+
+    def _append_reservoir(self, span):
+        self.seen += 1
+        if len(self._kept) < self.capacity:
+            self._kept.append(span)
+            return
+        index = random.randrange(self.seen)
+        if index < self.capacity:
+            self._aggregate(self._kept[index])
+            self._kept[index] = span
+        else:
+            self._aggregate(span)
+
+    def _append_slowest(self, span):
+        self.seen += 1
+        # the sequence number breaks ties, spans themselves are not comparable
+        entry = (span.end_ns - span.start_ns, self.seen, span)
+        if len(self._kept) < self.capacity:
+            heapq.heappush(self._kept, entry)
+        elif self.capacity:
+            self._aggregate(heapq.heappushpop(self._kept, entry)[2])
+        else:
+            self._aggregate(span)
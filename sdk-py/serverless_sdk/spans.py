@@ -8,32 +8,79 @@ except SyntaxError:
     def async_context_manager(context_manager):
         return context_manager
 
+try:
+    now_ns = time.perf_counter_ns  # python 3.7+
+except AttributeError:
+    try:
+        _perf_counter = time.perf_counter  # python 3.3+
+    except AttributeError:
+        _perf_counter = time.time  # python 2
+
+    def now_ns():
+        return int(_perf_counter() * 1000000000)
+
+
+# Pairs a wall clock reading with a `now_ns()` one, so span timestamps can be
+# recorded with the monotonic clock alone and converted to ISO 8601 when the
+# transaction is serialized. Re-anchored on every transaction start.
+_clock_anchor = (time.time(), now_ns())
+
+
+def set_clock_anchor():
+    global _clock_anchor
+    _clock_anchor = (time.time(), now_ns())
+
+
+def get_clock_anchor():
+    return _clock_anchor
+
+
+def format_timestamp(anchor, timestamp_ns):
+    wall_time, anchor_ns = anchor
+    return (
+        datetime.utcfromtimestamp(
+            wall_time + (timestamp_ns - anchor_ns) / 1000000000.0
+        ).isoformat()
+        + "Z"
+    )
+
 
 @async_context_manager
 class Span(object):
+    __slots__ = ("emmiter", "span_type", "tags", "anchor", "start_ns", "end_ns")
+
     def __init__(self, emmiter, span_type):
         self.emmiter = emmiter
         self.span_type = span_type
-        self.tags = {}
+        self.tags = None
 
     def set_tag(self, tag, value):
+        if self.tags is None:
+            self.tags = {}
         self.tags[tag] = value
 
+    @property
+    def duration(self):
+        """Duration in milliseconds"""
+        return (self.end_ns - self.start_ns) // 1000000
+
     def dump(self):
+        tags = {"type": self.span_type}
+        if self.tags:
+            tags.update(self.tags)
         return {
-            "tags": dict(type=self.span_type, **self.tags),
-            "startTime": self.start_isoformat,
-            "endTime": self.end_isoformat,
-            "duration": int((self.end - self.start) * 1000),
+            "tags": tags,
+            "startTime": format_timestamp(self.anchor, self.start_ns),
+            "endTime": format_timestamp(self.anchor, self.end_ns),
+            "duration": self.duration,
         }
 
     def __enter__(self):
-        self.start_isoformat = datetime.utcnow().isoformat() + "Z"
-        self.start = time.time()
+        self.anchor = _clock_anchor
+        self.start_ns = now_ns()
 
         return self
 
     def __exit__(self, exc_type, exc, tb):
-        self.end_isoformat = datetime.utcnow().isoformat() + "Z"
-        self.end = time.time()
-        self.emmiter(self.dump())
+        self.end_ns = now_ns()
+        self.emmiter(self)
@@ -0,0 +1,115 @@
+import json
+import linecache
+import os
+import sys
+from collections import deque
+
+from serverless_sdk.util import number_from_env
+
+DEFAULT_MAX_FRAMES = 50
+
+max_frames = number_from_env(
+    "SERVERLESS_ENTERPRISE_STACKTRACE_MAX_FRAMES", DEFAULT_MAX_FRAMES, int
+)
+# reading source lines hits the file system, allow opting out
+include_context_lines = os.environ.get(
+    "SERVERLESS_ENTERPRISE_STACKTRACE_CONTEXT_LINES", ""
+).lower() not in ("0", "false", "no")
+
+_abspath_cache = {}
+
+
+def _abspath(filename):
+    try:
+        return _abspath_cache[filename]
+    except KeyError:
+        path = _abspath_cache[filename] = os.path.abspath(filename)
+        return path
+
+
+def extract_traceback(tb, limit=None):
+    """(filename, lineno, function) of the innermost `limit` frames, innermost first"""
+    frames = deque(maxlen=max_frames if limit is None else limit)
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        frames.append((code.co_filename, tb.tb_lineno, code.co_name))
+        tb = tb.tb_next
+    frames.reverse()
+    return list(frames)
+
+
+def extract_stack(frame, limit=None):
+    """As `extract_traceback`, for the call stack leading to `frame`"""
+    limit = max_frames if limit is None else limit
+    frames = []
+    while frame is not None and len(frames) < limit:
+        code = frame.f_code
+        frames.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    return frames
+
+
+class StackTrace(object):
+    """
+    Frames of a captured error, serialized only when the transaction is.
+    Paths are resolved and source lines read at that point as well.
+    """
+
+    __slots__ = ("frames",)
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def to_json(self):
+        return json.dumps(
+            [
+                {
+                    "filename": filename,
+                    "lineno": lineno,
+                    "function": function,
+                    "library_frame": False,
+                    "abs_path": _abspath(filename),
+                    "pre_context": [],
+                    "context_line": linecache.getline(filename, lineno).strip()
+                    if include_context_lines
+                    else "",
+                    "post_context": [],
+                }
+                for filename, lineno, function in self.frames
+            ]
+        )
+
+
+def format_stacktrace(stacktrace):
+    if isinstance(stacktrace, StackTrace):
+        return stacktrace.to_json()
+    return stacktrace
+
+
+def capture_error(exception, fatal, tb=None, frame=None):
+    """
+    Error data tags of `exception`. The stack is read from `tb`, else from the
+    exception's own traceback, else (exception never raised) from `frame`.
+    """
+    if tb is None:
+        tb = getattr(exception, "__traceback__", None)
+        if tb is None:
+            exc_info = sys.exc_info()
+            if exc_info[1] is exception:  # python 2
+                tb = exc_info[2]
+    if tb is not None:
+        frames = extract_traceback(tb)
+    else:
+        frames = extract_stack(frame)
+    exc_type_name = type(exception).__name__
+    message = str(exception)
+    return {
+        "errorCulprit": "{} ({})".format(frames[0][2], frames[0][0])
+        if frames
+        else None,
+        "errorExceptionMessage": message,
+        "errorExceptionStacktrace": StackTrace(frames),
+        "errorExceptionType": exc_type_name,
+        "errorFatal": fatal,
+        "errorId": "{}!${}".format(exc_type_name, message[:200]),
+    }
@@ -0,0 +1,43 @@
+"""Helpers shared by the SDK modules, with their python 2 fallbacks"""
+import os
+import time
+
+try:
+    from functools import lru_cache  # python 3
+except ImportError:
+    lru_cache = None  # python 2
+
+try:
+    monotonic = time.monotonic  # python 3
+except AttributeError:
+    monotonic = time.time  # python 2
+
+
+def number_from_env(name, default, cast=float):
+    """`cast` of the environment variable `name`, `default` if unset or invalid"""
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def bounded_cache(func, maxsize):
+    """
+    `func` with its results cached per positional arguments, keeping at
+    most `maxsize` of them: `lru_cache` on python 3, a dict cleared when
+    full on python 2
+    """
+    if lru_cache is not None:
+        return lru_cache(maxsize=maxsize)(func)
+    cache = {}
+
+    def cached(*args):
+        try:
+            return cache[args]
+        except KeyError:
+            if len(cache) >= maxsize:
+                cache.clear()
+            result = cache[args] = func(*args)
+            return result
+
+    return cached
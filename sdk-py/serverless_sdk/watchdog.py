@@ -0,0 +1,49 @@
+import os
+import signal
+import threading
+
+from serverless_sdk.util import monotonic
+
+
+class TimeoutWatchdog(object):
+    """
+    Sends SIGTERM to the process when the armed deadline passes, so the
+    transaction can be reported right before Lambda kills the invocation.
+
+    A single thread is started on first use and re-armed for every
+    invocation, instead of a new `threading.Timer` thread per invocation.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._deadline = None
+        self._thread = None
+
+    def arm(self, seconds):
+        with self._condition:
+            self._deadline = monotonic() + seconds
+            if self._thread is None:
+                thread = threading.Thread(
+                    target=self._watch, name="serverless-sdk-watchdog"
+                )
+                thread.daemon = True
+                thread.start()
+                self._thread = thread
+            self._condition.notify()
+
+    def disarm(self):
+        with self._condition:
+            self._deadline = None
+
+    def _watch(self):
+        with self._condition:
+            while True:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._deadline = None
+                os.kill(os.getpid(), signal.SIGTERM)
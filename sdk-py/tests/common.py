@@ -0,0 +1,89 @@
+"""
+Helpers shared by the SDK tests.
+
+Tests are plain `unittest` test cases, run them from the `sdk-py` directory:
+
+    python -m unittest discover tests
+"""
+import base64
+import json
+import os
+import signal
+import sys
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serverless_sdk.emitter import GZIP_WBITS, LOG_PREFIX  # noqa: E402
+
+
+class FakeContext(object):
+    function_name = "test"
+    invoked_function_arn = "arn:aws:lambda:us-east-1:000000000000:function:test"
+    aws_request_id = "00000000-0000-0000-0000-000000000000"
+    memory_limit_in_mb = "1024"
+
+    def __init__(self, remaining_time_ms=6000):
+        self.remaining_time_ms = remaining_time_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_time_ms
+
+
+class LogStream(object):
+    """Collects the lines written by the emitter"""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data):
+        self.lines.extend(line for line in data.split("\n") if line)
+
+    def flush(self):
+        pass
+
+
+def make_sdk(**kwargs):
+    """An SDK writing to a `LogStream` (`sdk.emitter.stream`), uninstrumented"""
+    import serverless_sdk
+
+    options = dict(
+        org_id="org",
+        application_name="app",
+        app_uid="app-uid",
+        org_uid="org-uid",
+        deployment_uid="deployment-uid",
+        service_name="service",
+        should_log_meta=True,
+        should_compress_logs=True,
+        disable_aws_spans=True,
+        disable_http_spans=True,
+        stage_name="dev",
+        plugin_version="0.0.0",
+        disable_frameworks_instrumentation=True,
+        serverless_platform_stage="prod",
+    )
+    options.update(kwargs)
+    try:
+        # don't chain the SIGTERM handler of the SDK of another test
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    except ValueError:
+        pass  # not on the main thread
+    sdk = serverless_sdk.SDK(**options)
+    sdk.emitter.stream = LogStream()
+    return sdk
+
+
+def decode(line):
+    """The transaction of a `SERVERLESS_ENTERPRISE {"c", "b", "origin"}` line"""
+    assert line.startswith(LOG_PREFIX), line
+    envelope = json.loads(line[len(LOG_PREFIX) :])
+    if not envelope["c"]:
+        return envelope["b"]
+    body = zlib.decompress(base64.b64decode(envelope["b"]), GZIP_WBITS)
+    return json.loads(body.decode("utf-8"))
+
+
+def transactions(sdk):
+    """Transactions emitted so far by `sdk`, see `make_sdk`"""
+    return [decode(line) for line in sdk.emitter.stream.lines]
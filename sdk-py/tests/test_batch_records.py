@@ -0,0 +1,55 @@
+import unittest
+
+from common import FakeContext, make_sdk, transactions
+
+import serverless_sdk
+from serverless_sdk.batch_records import BatchRecords
+
+
+def sqs_event(*message_ids):
+    return {
+        "Records": [
+            {"eventSource": "aws:sqs", "messageId": message_id}
+            for message_id in message_ids
+        ]
+    }
+
+
+class BatchRecordsTest(unittest.TestCase):
+    def test_partial_batch_response(self):
+        sdk = make_sdk()
+
+        def handler(event, context):
+            batch = context.serverless_sdk.batch(event)
+            for record in batch:
+                if record["messageId"] != "b":
+                    batch.fail()
+            return batch.response()
+
+        event = sqs_event("a", "b", "c")
+        response = sdk.handler(handler, "test", 6)(event, FakeContext())
+
+        self.assertEqual(
+            response,
+            {"batchItemFailures": [{"itemIdentifier": "a"}, {"itemIdentifier": "c"}]},
+        )
+        [transaction] = transactions(sdk)
+        report = transaction["payload"]["tags"]["batchRecords"]
+        self.assertIn('"failedRecordIds": ["a", "c"]', report)
+
+    def test_unsupported_event_source(self):
+        event = {"Records": [{"eventSource": "aws:s3"}, {"eventSource": "aws:s3"}]}
+        with self.assertRaises(ValueError):
+            BatchRecords(event)
+
+    def test_without_sdk(self):
+        batch = serverless_sdk.batch(sqs_event("a"))
+        for record in batch:
+            batch.fail(record)
+        self.assertEqual(
+            batch.response(), {"batchItemFailures": [{"itemIdentifier": "a"}]}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import unittest
+
+from common import LogStream, decode
+
+from serverless_sdk.emitter import LOG_PREFIX, TransactionEmitter
+
+
+def make_transaction(span_count):
+    return {
+        "type": "transaction",
+        "origin": "sls-agent",
+        "payload": {
+            "duration": 120.5,
+            "spans": [
+                {
+                    "tags": {"type": "aws", "requestId": "R{:031d}".format(index)},
+                    "duration": index,
+                }
+                for index in range(span_count)
+            ],
+            "tags": {"functionName": "test"},
+        },
+        "requestId": "trace",
+    }
+
+
+def payload_size(line, compress):
+    """Size of the payload the cap applies to, the base64 gzip or the JSON body"""
+    body = json.loads(line[len(LOG_PREFIX) :])["b"]
+    return len(body if compress else json.dumps(body, separators=(",", ":")))
+
+
+class TransactionEmitterTest(unittest.TestCase):
+    def test_round_trip(self):
+        for compress in (True, False):
+            emitter = TransactionEmitter(compress=compress)
+            transaction = make_transaction(50)
+
+            decoded = decode(emitter.encode(transaction))
+
+            transaction["payload"]["droppedSpans"] = 0
+            self.assertEqual(decoded, transaction)
+            self.assertEqual(emitter.dropped_spans, 0)
+
+    def test_spans_over_the_cap_are_dropped(self):
+        for compress in (True, False):
+            emitter = TransactionEmitter(compress=compress, max_payload_size=20000)
+
+            line = emitter.encode(make_transaction(5000))
+
+            self.assertLessEqual(payload_size(line, compress), 20000)
+            payload = decode(line)["payload"]
+            spans = payload["spans"]
+            self.assertTrue(0 < len(spans) < 5000)
+            # the first spans are kept
+            self.assertEqual(
+                [span["duration"] for span in spans], list(range(len(spans)))
+            )
+            self.assertEqual(payload["droppedSpans"], 5000 - len(spans))
+            self.assertEqual(emitter.dropped_spans, payload["droppedSpans"])
+            self.assertEqual(payload["tags"], {"functionName": "test"})
+
+    def test_unserializable_values_as_strings(self):
+        transaction = make_transaction(1)
+        transaction["payload"]["spans"][0]["tags"]["custom"] = object()
+
+        decoded = decode(TransactionEmitter().encode(transaction))
+
+        custom = decoded["payload"]["spans"][0]["tags"]["custom"]
+        self.assertTrue(custom.startswith("<object object at "))
+
+    def test_emit_writes_a_line(self):
+        stream = LogStream()
+        emitter = TransactionEmitter(stream=stream)
+
+        emitter.emit(make_transaction(1))
+        emitter.emit(make_transaction(2))
+
+        self.assertEqual(len(stream.lines), 2)
+        self.assertEqual(len(decode(stream.lines[1])["payload"]["spans"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import signal
+import threading
+import time
+import unittest
+
+from common import FakeContext, make_sdk, transactions
+
+
+def wait_for_timeout(sdk):
+    deadline = time.time() + 5
+    while not sdk.invocation.processed and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class SigtermTest(unittest.TestCase):
+    def test_report_after_the_handler_is_replaced(self):
+        sdk = make_sdk()
+        received = []
+        # e.g. set by the user's code, imported after the SDK
+        signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+
+        def handler(event, context):
+            wait_for_timeout(sdk)
+
+        sdk.handler(handler, "test", 6)({}, FakeContext(remaining_time_ms=100))
+
+        [transaction] = transactions(sdk)
+        self.assertEqual(transaction["type"], "report")
+        self.assertEqual(received, [signal.SIGTERM])
+        self.assertEqual(signal.getsignal(signal.SIGTERM), sdk.handle_sigterm)
+
+    def test_replacing_handler_chaining_the_sdk(self):
+        sdk = make_sdk()
+        received = []
+        sdk_handler = signal.getsignal(signal.SIGTERM)
+
+        def user_handler(signum, frame):
+            received.append(signum)
+            sdk_handler(signum, frame)
+
+        signal.signal(signal.SIGTERM, user_handler)
+
+        def handler(event, context):
+            wait_for_timeout(sdk)
+
+        sdk.handler(handler, "test", 6)({}, FakeContext(remaining_time_ms=100))
+
+        self.assertEqual(len(transactions(sdk)), 1)
+        self.assertEqual(received, [signal.SIGTERM])
+
+    def test_no_watchdog_without_the_handler(self):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        sdks = []
+        thread = threading.Thread(target=lambda: sdks.append(make_sdk()))
+        thread.start()
+        thread.join()
+        [sdk] = sdks
+
+        def handler(event, context):
+            time.sleep(0.3)
+            return "done"
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                sdk.handler(handler, "test", 6)({}, FakeContext(remaining_time_ms=100))
+            )
+        )
+        thread.start()
+        thread.join()
+
+        # not killed by a SIGTERM no handler reports
+        self.assertEqual(results, ["done"])
+        [transaction] = transactions(sdk)
+        self.assertEqual(transaction["type"], "transaction")
+
+
+if __name__ == "__main__":
+    unittest.main()
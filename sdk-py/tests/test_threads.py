@@ -0,0 +1,72 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from common import FakeContext, make_sdk, transactions
+
+
+def span_types(transaction):
+    return [span["tags"]["type"] for span in transaction["payload"]["spans"]]
+
+
+class ThreadsTest(unittest.TestCase):
+    def test_pool_work_reports_to_the_submitting_invocation(self):
+        sdk = make_sdk()
+        pool = ThreadPoolExecutor(max_workers=1)
+
+        def job():
+            with sdk.span("job"):
+                pass
+
+        def handler(event, context):
+            pool.submit(job).result()
+
+        sdk.handler(handler, "test", 6)({}, FakeContext())
+        pool.shutdown()
+
+        self.assertEqual(span_types(transactions(sdk)[0]), ["job"])
+
+    def test_long_lived_thread_reports_to_the_running_invocation(self):
+        sdk = make_sdk()
+        jobs = []
+        requested = threading.Condition()
+        done = threading.Semaphore(0)
+
+        def worker():
+            while True:
+                with requested:
+                    while not jobs:
+                        requested.wait()
+                    name = jobs.pop()
+                if name is None:
+                    return
+                with sdk.span(name):
+                    pass
+                done.release()
+
+        thread = threading.Thread(target=worker)
+
+        def handler(event, context):
+            if not thread.is_alive():
+                thread.start()
+            with requested:
+                jobs.append(event["job"])
+                requested.notify()
+            done.acquire()
+
+        wrapped_handler = sdk.handler(handler, "test", 6)
+        for index in range(3):
+            wrapped_handler({"job": "job{}".format(index)}, FakeContext())
+        with requested:
+            jobs.append(None)
+            requested.notify()
+        thread.join()
+
+        self.assertEqual(
+            [span_types(transaction) for transaction in transactions(sdk)],
+            [["job0"], ["job1"], ["job2"]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import time
+import unittest
+
+from common import FakeContext, make_sdk, transactions
+
+import serverless_sdk
+
+
+class TimeoutTest(unittest.TestCase):
+    def test_report_while_the_handler_records_a_metric(self):
+        sdk = make_sdk()
+        processed = serverless_sdk.metric.counter("processed")
+
+        def handler(event, context):
+            # busy incrementing the counter when the SIGTERM lands, with its lock
+            # held as in `inc()`
+            deadline = time.time() + 5
+            with processed.lock:
+                while not sdk.invocation.processed and time.time() < deadline:
+                    processed.value += 1
+
+        sdk.handler(handler, "test", 6)({}, FakeContext(remaining_time_ms=100))
+
+        [transaction] = transactions(sdk)
+        self.assertEqual(transaction["type"], "report")
+        tags = transaction["payload"]["tags"]
+        self.assertEqual(tags["errorExceptionType"], "TimeoutError")
+        # left for the next transaction rather than waited for
+        self.assertNotIn(
+            "processed",
+            [value["name"] for value in transaction["payload"]["metrics"]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
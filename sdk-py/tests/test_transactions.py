@@ -0,0 +1,98 @@
+import json
+import time
+import unittest
+
+from common import FakeContext, make_sdk, transactions
+
+
+def fail():
+    raise KeyError("missing")
+
+
+class TransactionsTest(unittest.TestCase):
+    def test_transaction(self):
+        sdk = make_sdk()
+
+        def handler(event, context):
+            with context.span("work"):
+                pass
+            return "result"
+
+        result = sdk.handler(handler, "test", 6)({}, FakeContext())
+
+        self.assertEqual(result, "result")
+        [transaction] = transactions(sdk)
+        self.assertEqual(transaction["type"], "transaction")
+        payload = transaction["payload"]
+        self.assertEqual(payload["tags"]["errorId"], None)
+        self.assertEqual(
+            [span["tags"]["label"] for span in payload["spans"]], ["work"]
+        )
+        self.assertEqual(payload["droppedSpans"], 0)
+
+    def test_fatal_error(self):
+        sdk = make_sdk()
+
+        def handler(event, context):
+            fail()
+
+        with self.assertRaises(KeyError):
+            sdk.handler(handler, "test", 6)({}, FakeContext())
+
+        [transaction] = transactions(sdk)
+        self.assertEqual(transaction["type"], "error")
+        tags = transaction["payload"]["tags"]
+        self.assertEqual(tags["errorExceptionType"], "KeyError")
+        self.assertTrue(tags["errorFatal"])
+        self.assertTrue(tags["errorCulprit"].startswith("fail ("))
+        stacktrace = json.loads(tags["errorExceptionStacktrace"])
+        self.assertEqual(
+            [frame["function"] for frame in stacktrace[:2]], ["fail", "handler"]
+        )
+
+    def test_captured_error(self):
+        sdk = make_sdk()
+
+        def handler(event, context):
+            try:
+                fail()
+            except KeyError as error:
+                context.capture_exception(error)
+            return "result"
+
+        result = sdk.handler(handler, "test", 6)({}, FakeContext())
+
+        self.assertEqual(result, "result")
+        [transaction] = transactions(sdk)
+        self.assertEqual(transaction["type"], "error")
+        tags = transaction["payload"]["tags"]
+        self.assertEqual(tags["errorExceptionType"], "KeyError")
+        self.assertFalse(tags["errorFatal"])
+
+    def test_timeout_report(self):
+        sdk = make_sdk()
+
+        def handler(event, context):
+            with context.span("before timeout"):
+                pass
+            deadline = time.time() + 5
+            while not sdk.invocation.processed and time.time() < deadline:
+                time.sleep(0.01)
+            return "late"
+
+        result = sdk.handler(handler, "test", 6)({}, FakeContext(remaining_time_ms=100))
+
+        self.assertEqual(result, "late")
+        # reported once, on timeout rather than when the handler returns
+        [transaction] = transactions(sdk)
+        self.assertEqual(transaction["type"], "report")
+        payload = transaction["payload"]
+        self.assertEqual(payload["tags"]["errorExceptionType"], "TimeoutError")
+        self.assertEqual(payload["tags"]["errorCulprit"], "timeout")
+        self.assertEqual(
+            [span["tags"]["label"] for span in payload["spans"]], ["before timeout"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()